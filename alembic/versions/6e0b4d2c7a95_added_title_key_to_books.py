@@ -0,0 +1,74 @@
+"""added title key to books
+
+Revision ID: 6e0b4d2c7a95
+Revises: 2f6c8e4a9b1d
+Create Date: 2026-10-19 15:21:48.630917
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e0b4d2c7a95'
+down_revision: Union[str, Sequence[str], None] = '2f6c8e4a9b1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def title_key(title: str) -> str:
+    # Same as app.models.book.title_key, copied so the revision never changes
+    normalized = " ".join(title.casefold().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column('title_key', sa.String(length=64), nullable=True))
+
+    # Backfill in id order, BATCH_SIZE rows per UPDATE. Titles that were
+    # already near-duplicates of an older book get a key of their own (mixed
+    # with their id) so the unique index can be built; they are reported below.
+    conn = op.get_bind()
+    books = sa.table('books', sa.column('id', sa.Integer), sa.column('title', sa.String), sa.column('title_key', sa.String))
+    seen_keys = set()
+    duplicates = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(books.c.id, books.c.title)
+            .where(books.c.id > last_id)
+            .order_by(books.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        values = []
+        for book_id, title in rows:
+            key = title_key(title)
+            if key in seen_keys:
+                duplicates += 1
+                key = title_key(f"{title}\0{book_id}")
+            seen_keys.add(key)
+            values.append({'book_id': book_id, 'key': key})
+        conn.execute(
+            books.update().where(books.c.id == sa.bindparam('book_id')).values(title_key=sa.bindparam('key')),
+            values,
+        )
+        last_id = rows[-1].id
+    if duplicates:
+        print(f"title_key: {duplicates} book(s) repeat an older title and were given a unique key")
+
+    op.alter_column('books', 'title_key', nullable=False)
+    op.create_index(op.f('ix_books_title_key'), 'books', ['title_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_books_title_key'), table_name='books')
+    op.drop_column('books', 'title_key')
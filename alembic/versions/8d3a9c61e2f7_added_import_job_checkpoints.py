@@ -0,0 +1,42 @@
+"""added import job checkpoints
+
+Revision ID: 8d3a9c61e2f7
+Revises: 5b1e7f0c2d4a
+Create Date: 2026-10-19 11:40:05.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3a9c61e2f7'
+down_revision: Union[str, Sequence[str], None] = '5b1e7f0c2d4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('import_jobs', sa.Column('job_key', sa.String(length=255), nullable=True))
+    op.add_column('import_jobs', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('import_jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('import_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    # Jobs queued before this revision have no hash to match; give them keys no
+    # upload can produce
+    op.execute("UPDATE import_jobs SET job_key = 'job:' || id, content_hash = '', heartbeat_at = started_at")
+    op.alter_column('import_jobs', 'job_key', nullable=False)
+    op.alter_column('import_jobs', 'content_hash', nullable=False)
+    op.alter_column('import_jobs', 'attempts', server_default=None)
+    op.create_unique_constraint(op.f('import_jobs_user_id_job_key_key'), 'import_jobs', ['user_id', 'job_key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('import_jobs_user_id_job_key_key'), 'import_jobs', type_='unique')
+    op.drop_column('import_jobs', 'heartbeat_at')
+    op.drop_column('import_jobs', 'attempts')
+    op.drop_column('import_jobs', 'content_hash')
+    op.drop_column('import_jobs', 'job_key')
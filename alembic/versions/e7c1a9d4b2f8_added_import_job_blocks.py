@@ -0,0 +1,49 @@
+"""added import job blocks
+
+Revision ID: e7c1a9d4b2f8
+Revises: d3b8f5a1e6c2
+Create Date: 2026-10-19 21:05:17.204311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c1a9d4b2f8'
+down_revision: Union[str, Sequence[str], None] = 'd3b8f5a1e6c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('import_job_blocks',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['import_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'seq')
+    )
+    # Files of unfinished jobs were spooled to a local directory and are not
+    # moved over; resubmitting such a job queues it again from its checkpoint
+    op.execute(
+        "UPDATE import_jobs SET status = 'failed', finished_at = now(), "
+        "detail = 'Upload must be submitted again' "
+        "WHERE status IN ('queued', 'running')"
+    )
+    op.drop_column('import_jobs', 'file_path')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "UPDATE import_jobs SET status = 'failed', finished_at = now(), "
+        "detail = 'Upload must be submitted again' "
+        "WHERE status IN ('queued', 'running')"
+    )
+    op.add_column('import_jobs', sa.Column('file_path', sa.String(), server_default='', nullable=False))
+    op.alter_column('import_jobs', 'file_path', server_default=None)
+    op.drop_table('import_job_blocks')
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded mapping with least-recently-used eviction and an optional TTL.
+
+    Not thread-safe; every caller runs on an event loop and never awaits while
+    touching it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at and expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class GenerationCache(LRUCache):
+    """
+    LRUCache whose entries all go stale at once when `bump` raises its
+    generation.
+
+    Entries are stored under the generation read before the value was loaded
+    (pass it to `set`), so a load that overlapped a write is never served
+    after the write bumps the generation. Entries of older generations are
+    not looked for: they are never hit again and age out of the LRU order.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        super().__init__(maxsize, ttl)
+        self.generation = 0
+
+    def bump(self) -> None:
+        self.generation += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return super().get((self.generation, key), default)
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        if generation is None:
+            generation = self.generation
+        super().set((generation, key), value)
+
+    def pop(self, key: Hashable) -> None:
+        super().pop((self.generation, key))
+
+    def stats(self) -> dict:
+        return {**super().stats(), "generation": self.generation}
@@ -6,9 +6,50 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     database_url: Optional[str] = None
     test_database_url: Optional[str] = None
+    app_env: str = "development"
+    db_fault_injection: Optional[str] = None
     jwt_secret: str = "your_jwt_secret_key"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    genre_cache_ttl_seconds: float = 300
+    author_cache_size: int = 10000
+    author_cache_ttl_seconds: float = 600
+    book_total_cache_size: int = 1000
+    book_total_cache_ttl_seconds: float = 30
+    book_reads_core: bool = True
+    book_result_cache: bool = True
+    book_detail_cache_size: int = 10000
+    book_detail_cache_ttl_seconds: float = 60
+    book_list_cache_size: int = 1000
+    book_list_cache_ttl_seconds: float = 10
+    # Larger pages are not cached, which bounds the list cache to
+    # book_list_cache_size * book_list_cache_max_books books
+    book_list_cache_max_books: int = 200
+    book_read_coalescing: bool = True
+    # Other processes' writes reach this process's caches over LISTEN/NOTIFY
+    cache_invalidation_bus: bool = True
+    cache_invalidation_channel: str = "cache_invalidation"
+    cache_invalidation_keepalive_seconds: float = 10
+    # Cache-Control of the book detail and list responses; the default lets
+    # clients keep them but makes them revalidate with the ETag each time
+    book_detail_cache_control: str = "private, no-cache"
+    book_list_cache_control: str = "private, no-cache"
+    lookup_batching: bool = True
+    lookup_batch_tick_ms: float = 2.0
+    book_batch_max_ids: int = 100
+    bulk_upload_chunk_size: int = 1000
+    bulk_upload_max_errors: int = 1000
+    bulk_update_max_rows: int = 10000
+    bulk_delete_max_rows: int = 10000
+    bulk_delete_chunk_size: int = 1000
+    import_workers: int = 2
+    import_jobs_per_user: int = 1
+    import_poll_interval_seconds: float = 1.0
+    import_job_stale_seconds: float = 300
+    import_job_max_attempts: int = 3
+    traffic_capture_path: Optional[str] = None
+    traffic_capture_max_bytes: int = 50 * 1024 * 1024
+    traffic_capture_backup_count: int = 5
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,130 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import asyncio
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.util import await_only
 
 from app.core.config import settings
 
 DATABASE_URL = str(settings.database_url)
 
+FAULT_INJECTION_ENVS = {"test", "bench"}
+STATEMENT_TYPES = ("select", "insert", "update", "delete", "commit", "other")
+
+
+class InjectedDatabaseFault(Exception):
+    pass
+
+
+@dataclass
+class FaultProfile:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    distribution: Literal["fixed", "uniform", "exponential"] = "fixed"
+    failure_rate: float = 0.0
+
+
+class FaultInjector:
+    """
+    Add latency and failures to the statements and commits of an engine.
+
+    Profiles are keyed by statement type (select, insert, update, delete,
+    commit, other). The random generator is seeded, so a given spec produces
+    the same sequence of delays and failures on every run. Delays are awaited
+    on the event loop, so slow statements hold their pooled connection without
+    blocking other requests, exactly like a slow server would.
+
+    Example spec (also accepted as JSON in DB_FAULT_INJECTION):
+
+        {"seed": 1,
+         "select": {"latency_ms": 20, "jitter_ms": 5},
+         "commit": {"latency_ms": 50, "distribution": "exponential",
+                    "failure_rate": 0.01}}
+    """
+
+    def __init__(self, profiles: dict[str, FaultProfile], seed: int | None = None):
+        unknown = set(profiles) - set(STATEMENT_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown statement types: {', '.join(sorted(unknown))}")
+        self.profiles = profiles
+        self.random = random.Random(seed)
+        self.stats: Counter[str] = Counter()
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> "FaultInjector":
+        spec = dict(spec)
+        seed = spec.pop("seed", None)
+        profiles = {kind: FaultProfile(**profile) for kind, profile in spec.items()}
+        return cls(profiles, seed=seed)
+
+    def install(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine.sync_engine, "commit", self._before_commit)
+
+    def remove(self, engine: AsyncEngine) -> None:
+        event.remove(engine.sync_engine, "before_cursor_execute", self._before_execute)
+        event.remove(engine.sync_engine, "commit", self._before_commit)
+
+    def _delay(self, profile: FaultProfile) -> float:
+        if profile.distribution == "exponential" and profile.latency_ms > 0:
+            delay = self.random.expovariate(1 / profile.latency_ms)
+        elif profile.distribution == "uniform":
+            delay = self.random.uniform(0, 2 * profile.latency_ms)
+        else:
+            delay = profile.latency_ms
+        if profile.jitter_ms:
+            delay += self.random.uniform(-profile.jitter_ms, profile.jitter_ms)
+        return max(delay, 0.0) / 1000
+
+    def _inject(self, kind: str, statement: str, parameters) -> None:
+        profile = self.profiles.get(kind)
+        if profile is None:
+            return
+
+        delay = self._delay(profile)
+        if delay:
+            self.stats[f"{kind}_delayed"] += 1
+            await_only(asyncio.sleep(delay))
+
+        if profile.failure_rate and self.random.random() < profile.failure_rate:
+            self.stats[f"{kind}_failed"] += 1
+            raise OperationalError(
+                statement, parameters, InjectedDatabaseFault(f"injected {kind} failure")
+            )
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        keyword = statement.lstrip().split(None, 1)[0].lower() if statement else ""
+        kind = keyword if keyword in STATEMENT_TYPES else "other"
+        self._inject(kind, statement, parameters)
+
+    def _before_commit(self, conn):
+        self._inject("commit", "COMMIT", None)
+
+
 engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 async_session = async_sessionmaker(
     bind=engine, expire_on_commit=False, class_=AsyncSession
 )
 
+fault_injector: FaultInjector | None = None
+if settings.db_fault_injection:
+    if settings.app_env not in FAULT_INJECTION_ENVS:
+        raise RuntimeError("DB_FAULT_INJECTION is only allowed when APP_ENV is test or bench")
+    fault_injector = FaultInjector.from_spec(json.loads(settings.db_fault_injection))
+    fault_injector.install(engine)
+
 Base = declarative_base()
 
 
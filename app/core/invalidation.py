@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import Counter
+from typing import Callable, Iterable
+
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.session_info import discard_on_rollback
+
+logger = logging.getLogger(__name__)
+
+# pg_notify refuses payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+# Invalidations recorded by the current transaction: kind -> keys, None for all
+_PENDING = discard_on_rollback("pending_invalidations")
+
+Handler = Callable[[list | None], None]
+
+
+class InvalidationBus:
+    """
+    Cross-process invalidation of the in-process caches over LISTEN/NOTIFY.
+
+    Write paths `publish` what they changed into the session; when the
+    session commits, one `pg_notify` sent in the same transaction carries it
+    all, so the message goes out if and only if the write is committed. Each
+    process listens on the channel (see InvalidationListener) and hands the
+    messages of other processes to the handler registered for each kind;
+    a handler gets the changed keys, or None to drop everything it caches.
+
+    Messages are not numbered: transactions of one process commit, and
+    their notifications arrive, in any order. A notification sent in the
+    transaction is delivered to every connected listener, and the listener
+    flushes all caches whenever it (re)connects, which covers what it missed.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex[:12]
+        self.handlers: dict[str, Handler] = {}
+        self.stats: Counter[str] = Counter()
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def publish(self, session: Session, kind: str, keys: Iterable | None = None) -> None:
+        pending = session.info.setdefault(_PENDING, {})
+        if keys is None or (kind in pending and pending[kind] is None):
+            pending[kind] = None
+        else:
+            pending[kind] = sorted({*pending.get(kind, ()), *keys})
+
+    def message(self, pending: dict[str, list | None]) -> str:
+        payload = json.dumps({"o": self.origin, "i": pending}, separators=(",", ":"))
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            # Too many keys to list: drop everything of those kinds instead
+            payload = json.dumps(
+                {"o": self.origin, "i": dict.fromkeys(pending)}, separators=(",", ":")
+            )
+        return payload
+
+    def apply(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            origin, invalidations = message["o"], message["i"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Unreadable invalidation message: %r", payload)
+            self.stats["unreadable"] += 1
+            self.flush()
+            return
+
+        if origin == self.origin:
+            # Already applied by the commit that sent it
+            return
+
+        self.stats["applied"] += 1
+        for kind, keys in invalidations.items():
+            handler = self.handlers.get(kind)
+            if handler is not None:
+                handler(keys)
+
+    def flush(self) -> None:
+        self.stats["flushes"] += 1
+        for handler in self.handlers.values():
+            handler(None)
+
+
+invalidation_bus = InvalidationBus()
+
+
+def listener_dsn(url: URL) -> str:
+    # asyncpg takes a plain postgresql:// URL, without the SQLAlchemy driver
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class InvalidationListener:
+    """
+    Keeps one connection, outside the pool, listening on the invalidation
+    channel and applies what arrives through `bus`.
+
+    Notifications sent while the connection is down are lost, so after every
+    (re)connect all caches are flushed. A dead connection is noticed by the
+    termination callback or by the periodic keepalive query, and reconnected
+    with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        bus: InvalidationBus,
+        dsn: str,
+        channel: str,
+        keepalive_interval: float = 10.0,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+    ):
+        self.bus = bus
+        self.dsn = dsn
+        self.channel = channel
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="invalidation-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _notified(self, connection, pid, channel, payload) -> None:
+        self.bus.apply(payload)
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self._listen()
+                # Lost after listening for a while: retry straight away
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Invalidation listener cannot connect: %s", exc)
+            self.bus.stats["reconnects"] += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _listen(self) -> None:
+        """Listen until the connection is lost; raises if it cannot connect."""
+        connection = await asyncpg.connect(self.dsn)
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda connection: lost.set())
+        try:
+            await connection.add_listener(self.channel, self._notified)
+            self.bus.flush()
+            self.connected.set()
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    try:
+                        await connection.execute("SELECT 1")
+                    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as exc:
+                        logger.warning("Invalidation listener lost its connection: %s", exc)
+                        return
+        finally:
+            self.connected.clear()
+            connection.terminate()
+
+
+@event.listens_for(Session, "before_commit")
+def _send_invalidations(session):
+    if not settings.cache_invalidation_bus:
+        return
+    # The commit flushes after this event; flush now so the flush's changes
+    # are published too
+    session.flush()
+    pending = session.info.get(_PENDING)
+    if pending:
+        session.execute(
+            select(
+                func.pg_notify(
+                    settings.cache_invalidation_channel, invalidation_bus.message(pending)
+                )
+            )
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_invalidations(session):
+    session.info.pop(_PENDING, None)
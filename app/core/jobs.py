@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    A fixed number of tasks that repeatedly run `job(db)` with a fresh session.
+
+    `job` returns True when it did some work, in which case the worker asks
+    for more straight away; otherwise it sleeps for `poll_interval`. Errors
+    are logged and never stop the worker.
+    """
+
+    def __init__(
+        self,
+        job: Callable[[AsyncSession], Awaitable[bool]],
+        session_factory: async_sessionmaker,
+        workers: int,
+        poll_interval: float,
+    ):
+        self.job = job
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        for number in range(self.workers):
+            self._tasks.append(
+                asyncio.create_task(self._work(), name=f"{self.job.__name__}-{number}")
+            )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    busy = await self.job(db)
+            except Exception:
+                logger.exception("%s failed", self.job.__name__)
+                busy = False
+            if not busy:
+                await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,186 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+READ_SIZE = 64 * 1024
+# Largest single entry (in characters) the parsers will buffer
+MAX_ITEM_SIZE = 1024 * 1024
+
+_WHITESPACE = " \t\n\r"
+# Characters a number, literal or escape cannot continue with
+_TOKEN_END = re.compile(r'[\s,:\[\]{}"]')
+_decoder = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    pass
+
+
+class TextBuffer:
+    """
+    Text read incrementally from an async `read(size)` callable.
+
+    Only the unconsumed tail is kept between reads, so memory is bounded by
+    the read size plus the largest entry being decoded.
+    """
+
+    def __init__(self, read: Callable[[int], Awaitable[bytes]], read_size: int):
+        self._read = read
+        self._read_size = read_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self) -> bool:
+        """Read the next block; return False once the stream is exhausted."""
+        if self.eof:
+            return False
+        data = await self._read(self._read_size)
+        if not data:
+            self.eof = True
+        try:
+            text = self._decoder.decode(data, final=self.eof)
+        except UnicodeDecodeError as exc:
+            raise JSONStreamError(f"File is not valid UTF-8: {exc.reason}") from exc
+        self.text = self.text[self.pos :] + text
+        self.pos = 0
+        return not self.eof
+
+    async def peek(self) -> str | None:
+        """Skip whitespace and return the next character, or None at the end."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not await self.fill() and self.pos >= len(self.text):
+                return None
+
+
+def _may_be_truncated(text: str, exc: json.JSONDecodeError) -> bool:
+    """
+    Whether the error could be the entry running past the end of `text`:
+    an open string, or a token that reaches the end of the buffer. Anything
+    else is a syntax error that more input cannot fix.
+    """
+    if exc.msg.startswith("Unterminated string"):
+        return True
+    return _TOKEN_END.search(text, exc.pos) is None
+
+
+class JSONArrayStream:
+    """Yield the elements of a top-level JSON array one at a time."""
+
+    def __init__(
+        self,
+        read: Callable[[int], Awaitable[bytes]],
+        read_size: int = READ_SIZE,
+        max_item_size: int = MAX_ITEM_SIZE,
+    ):
+        self._buffer = TextBuffer(read, read_size)
+        self._max_item_size = max_item_size
+
+    async def start(self) -> None:
+        """Consume the opening bracket, failing early if the file is not an array."""
+        char = await self._buffer.peek()
+        if char is None:
+            raise JSONStreamError("Failed to decode JSON: the file is empty.")
+        if char != "[":
+            raise JSONStreamError("JSON file must contain a list of book objects.")
+        self._buffer.pos += 1
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        buffer = self._buffer
+        first = True
+        while True:
+            char = await buffer.peek()
+            if char is None:
+                raise JSONStreamError("Failed to decode JSON: unexpected end of file.")
+            if char == "]":
+                buffer.pos += 1
+                if await buffer.peek() is not None:
+                    raise JSONStreamError("Failed to decode JSON: extra data after the list.")
+                return
+            if not first:
+                if char != ",":
+                    raise JSONStreamError(
+                        "Failed to decode JSON: expected ',' between list items."
+                    )
+                buffer.pos += 1
+            yield await self._decode_item()
+            first = False
+
+    async def _decode_item(self) -> Any:
+        buffer = self._buffer
+        while True:
+            if await buffer.peek() is None:
+                raise JSONStreamError("Failed to decode JSON: unexpected end of file.")
+            try:
+                value, end = _decoder.raw_decode(buffer.text, buffer.pos)
+            except json.JSONDecodeError as exc:
+                if buffer.eof or not _may_be_truncated(buffer.text, exc):
+                    raise JSONStreamError(f"Failed to decode JSON: {exc.msg}.") from exc
+                if len(buffer.text) - buffer.pos > self._max_item_size:
+                    raise JSONStreamError("Book entry is too large.") from exc
+                await buffer.fill()
+                continue
+            # A number or literal may continue in the next block; "-1" of
+            # "-1.5" even decodes on its own, followed by the rest
+            if not buffer.eof and (
+                end == len(buffer.text)
+                or type(value) in (int, float) and _TOKEN_END.search(buffer.text, end) is None
+            ):
+                if len(buffer.text) - buffer.pos > self._max_item_size:
+                    raise JSONStreamError("Book entry is too large.")
+                await buffer.fill()
+                continue
+            buffer.pos = end
+            return value
+
+
+class NDJSONStream:
+    """Yield one decoded value per non-blank line of newline-delimited JSON."""
+
+    def __init__(
+        self,
+        read: Callable[[int], Awaitable[bytes]],
+        read_size: int = READ_SIZE,
+        max_item_size: int = MAX_ITEM_SIZE,
+    ):
+        self._buffer = TextBuffer(read, read_size)
+        self._max_item_size = max_item_size
+
+    async def start(self) -> None:
+        pass
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        buffer = self._buffer
+        line_number = 0
+        while True:
+            newline = buffer.text.find("\n", buffer.pos)
+            if newline == -1:
+                if len(buffer.text) - buffer.pos > self._max_item_size:
+                    raise JSONStreamError("Book entry is too large.")
+                if await buffer.fill():
+                    continue
+                newline = len(buffer.text)
+                if buffer.pos >= newline:
+                    return
+
+            line = buffer.text[buffer.pos : newline]
+            buffer.pos = newline + 1
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise JSONStreamError(
+                    f"Failed to decode JSON on line {line_number}: {exc.msg}."
+                ) from exc
+            yield value
+
+
+STREAM_FORMATS = {"json": JSONArrayStream, "ndjson": NDJSONStream}
@@ -0,0 +1,43 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONModelResponse(JSONResponse):
+    """
+    A JSON response for data that is already a response model (or plain
+    JSON-ready data), serialized with orjson.
+
+    Returning a Response from a route makes FastAPI skip validating the result
+    against `response_model` again and running it through `jsonable_encoder`;
+    the route keeps its `response_model` for the OpenAPI schema. The body is
+    byte-for-byte what JSONResponse renders for the same model: compact
+    separators, UTF-8 without escaping non-ASCII characters.
+
+    Only models whose fields are plain JSON types belong here; anything orjson
+    or `model_dump` would render differently from the standard encoder
+    (floats, datetimes, custom serializers) should go through FastAPI as usual.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return orjson.dumps(content)
+
+
+def parse_etags(header: str) -> list[str]:
+    """The entity tags of an If-Match or If-None-Match header, in order."""
+    return [etag.strip() for etag in header.split(",") if etag.strip()]
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether If-None-Match names `etag`, so a GET can be answered with 304.
+    The comparison is weak: a `W/` prefix on either side is ignored.
+    """
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag.removeprefix("W/") in {
+        tag.removeprefix("W/") for tag in etags
+    }
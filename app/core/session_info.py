@@ -0,0 +1,24 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# session.info key -> whether a rolled back savepoint drops it too
+_ROLLBACK_KEYS: dict[str, bool] = {}
+
+
+def discard_on_rollback(key: str, savepoints: bool = False) -> str:
+    """
+    Drop `session.info[key]` when the session's transaction rolls back.
+
+    A rolled back savepoint keeps the key by default, since it may record
+    earlier writes of the transaction; `savepoints=True` drops it then as
+    well. Returns the key, so modules can declare it in one line.
+    """
+    _ROLLBACK_KEYS[key] = savepoints
+    return key
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_transaction_state(session, previous_transaction):
+    for key, savepoints in _ROLLBACK_KEYS.items():
+        if savepoints or not previous_transaction.nested:
+            session.info.pop(key, None)
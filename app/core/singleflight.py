@@ -0,0 +1,66 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one.
+
+    The first caller of a key (the leader) runs `load`; callers arriving with
+    the same key while it runs wait for its result, or its exception,
+    instead of running their own. The key is forgotten as soon as the call
+    finishes, so nothing is cached here.
+
+    A waiter that is cancelled stops waiting without disturbing the others.
+    If the leader is cancelled (say its client disconnected), its load is
+    cancelled with it, since it runs on the leader's session; the waiters
+    then start over, and one of them leads the next call.
+
+    Not thread-safe; like LRUCache, it is only used from the event loop.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, asyncio.Future] = {}
+        self.stats: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, load)
+
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling() or not flight.cancelled():
+                    raise
+                self.stats["retried"] += 1
+
+    async def _lead(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["executed"] += 1
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # Waiters re-raise it; without any, it must not be logged as lost
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+    def coalescing_rate(self) -> float:
+        calls = self.stats["executed"] + self.stats["coalesced"]
+        return self.stats["coalesced"] / calls if calls else 0.0
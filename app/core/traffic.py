@@ -0,0 +1,85 @@
+import json
+import logging
+import time
+from logging.handlers import RotatingFileHandler
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SENSITIVE_PARAMS = {"token", "access_token", "refresh_token", "password", "api_key"}
+
+
+def sanitize_query(query_string: bytes) -> dict[str, list[str]]:
+    """Parse a raw query string, dropping credentials but keeping every filter."""
+    params: dict[str, list[str]] = {}
+    for key, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        if key.lower() in SENSITIVE_PARAMS:
+            continue
+        params.setdefault(key, []).append(value)
+    return params
+
+
+def build_record(scope: Scope, status_code: int, duration: float) -> dict:
+    route = scope.get("route")
+    return {
+        "ts": time.time(),
+        "method": scope["method"],
+        "route": getattr(route, "path", scope["path"]),
+        "path": scope["path"],
+        "query": sanitize_query(scope.get("query_string", b"")),
+        "status": status_code,
+        "duration_ms": round(duration * 1000, 3),
+    }
+
+
+def create_capture_logger(path: str, max_bytes: int, backup_count: int) -> logging.Logger:
+    logger = logging.getLogger(f"traffic_capture.{path}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+class TrafficCaptureMiddleware:
+    """
+    Record the shape of every HTTP request as one JSON line in a rotating file.
+
+    Only the method, matched route, path, query parameters, status and duration
+    are stored. Headers (and with them the bearer token) and bodies are never
+    written, and credential-like query parameters are stripped.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+    ) -> None:
+        self.app = app
+        self.logger = create_capture_logger(path, max_bytes, backup_count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record = build_record(scope, status_code, time.perf_counter() - start)
+            self.logger.info(json.dumps(record, separators=(",", ":")))
@@ -1,28 +1,123 @@
-from sqlalchemy import select
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.session_info import discard_on_rollback
+from app.crud.loader import author_id_loader
 from app.models.author import Author
 
+# Committed author ids, shared by every request in the process
+author_id_cache = LRUCache(
+    maxsize=settings.author_cache_size, ttl=settings.author_cache_ttl_seconds
+)
 
-async def get_or_create_authors(
+# Per-transaction lookups (None for names known to be missing), kept in
+# session.info and only promoted to author_id_cache once the transaction commits;
+# a rolled back savepoint drops them as well, they may name rows it took back
+_TRANSACTION_AUTHOR_IDS = discard_on_rollback("author_ids", savepoints=True)
+# Set once the transaction has inserted authors: from then on the session holds
+# uncommitted rows, so it must not run author_id_loader batches for others
+_AUTHORS_INSERTED = discard_on_rollback("authors_inserted")
+
+
+def _transaction_author_ids(db: AsyncSession) -> dict[str, int | None]:
+    return db.info.setdefault(_TRANSACTION_AUTHOR_IDS, {})
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_author_ids(session):
+    session.info.pop(_AUTHORS_INSERTED, None)
+    author_ids = session.info.pop(_TRANSACTION_AUTHOR_IDS, {})
+    for name, author_id in author_ids.items():
+        if author_id is not None:
+            author_id_cache.set(name, author_id)
+
+
+def _invalidate_author_ids(names: list | None) -> None:
+    if names is None:
+        author_id_cache.clear()
+    else:
+        for name in names:
+            author_id_cache.pop(name)
+
+
+invalidation_bus.register("authors", _invalidate_author_ids)
+
+
+@event.listens_for(Author, "after_delete")
+def _author_deleted(mapper, connection, target):
+    author_id_cache.pop(target.name)
+    invalidation_bus.publish(object_session(target), "authors", [target.name])
+
+
+@event.listens_for(Author, "after_update")
+def _author_updated(mapper, connection, target):
+    # The old name is gone from the instance, so drop everything
+    author_id_cache.clear()
+    invalidation_bus.publish(object_session(target), "authors")
+
+
+async def get_or_create_author_ids(
     db: AsyncSession,
     author_names: list[str],
-) -> list[Author]:
-    existing_authors = await db.execute(
-        select(Author).filter(Author.name.in_(author_names))
-    )
-    existing_authors = list(existing_authors.scalars().all())
+) -> dict[str, int]:
+    """
+    Map author names to ids, inserting the missing authors.
+
+    Runs in the caller's transaction and never commits. Names are resolved
+    from the process-wide cache first, then from lookups made earlier in the
+    same transaction, then through the shared batch loader when lookup
+    batching is enabled, unless this transaction already inserted authors
+    (the loader would run other requests' lookups on this session, which
+    could then see the uncommitted rows). The upsert returns the rows it inserted; names that
+    already existed (or were inserted by a concurrent transaction) are picked
+    up by one fallback select. Ids only reach the shared cache after commit,
+    so a rollback never leaves ids of rows that do not exist behind.
+    """
+    names = list(dict.fromkeys(author_names))
+    if not names:
+        return {}
+
+    transaction_ids = _transaction_author_ids(db)
+    author_ids = {}
+    for name in names:
+        author_id = transaction_ids.get(name) or author_id_cache.get(name)
+        if author_id is not None:
+            author_ids[name] = author_id
 
-    existing_names = {str(author.name) for author in existing_authors}
-    new_names = set(author_names) - existing_names
+    lookup_names = [
+        name for name in names if name not in author_ids and name not in transaction_ids
+    ]
+    if settings.lookup_batching and lookup_names and not db.info.get(_AUTHORS_INSERTED):
+        found_ids = await author_id_loader.load_many(db, lookup_names)
+        author_ids.update(found_ids)
+        for name in lookup_names:
+            transaction_ids[name] = found_ids.get(name)
 
-    new_authors = [Author(name=name) for name in new_names]
-    db.add_all(new_authors)
+    new_names = [name for name in names if name not in author_ids]
+    if new_names:
+        result = await db.execute(
+            pg_insert(Author)
+            .values([{"name": name} for name in new_names])
+            .on_conflict_do_nothing(index_elements=[Author.name])
+            .returning(Author.id, Author.name)
+        )
+        inserted = {name: author_id for author_id, name in result.all()}
+        if inserted:
+            db.info[_AUTHORS_INSERTED] = True
+        author_ids.update(inserted)
 
-    if new_authors:
-        await db.commit()
+    missing_names = [name for name in names if name not in author_ids]
+    if missing_names:
+        result = await db.execute(
+            select(Author.id, Author.name).filter(Author.name.in_(missing_names))
+        )
+        author_ids.update({name: author_id for author_id, name in result.all()})
 
-        for author in new_authors:
-            await db.refresh(author)
+    transaction_ids.update(author_ids)
+    return {name: author_ids[name] for name in names}
 
-    return existing_authors + new_authors
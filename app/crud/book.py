@@ -1,62 +1,194 @@
+import base64
+import hashlib
+import json
 from typing import Literal
 
+import asyncpg
 from fastapi import HTTPException, status
-from sqlalchemy import func, select
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import selectinload
-
-from app.crud.author import get_or_create_authors
-from app.crud.genre import get_genre_by_name
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.crud.author import get_or_create_author_ids
+from app.crud.book_cache import (
+    book_detail_cache,
+    book_list_cache,
+    book_read_flights,
+    books_changed_in,
+)
+from app.crud.genre import get_genre_id_by_name
 from app.models.author import Author
-from app.models.book import Book
+from app.models.book import Book, book_author_association, book_year_sort_key, title_key
 from app.models.genre import Genre
-from app.schemas.book import BookCreate, BookRead, MultipleBooksResponse
+from app.schemas.book import (
+    BookCreate,
+    BookRead,
+    BookUpdate,
+    BooksBatchResponse,
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    BulkUpdateRequest,
+    BulkUpdateResponse,
+    MultipleBooksResponse,
+    total_mode_literal,
+)
 
 
 async def save_book(
     payload: BookCreate,
     db: AsyncSession,
 ) -> BookRead:
-    book = await db.execute(select(Book).where(Book.title == payload.title))
-    if book.scalars().first():
+    key = title_key(payload.title)
+    genre_id = await get_genre_id_by_name(db, payload.genre)
+
+    if not genre_id:
+        # A duplicate title is reported ahead of an unknown genre
+        if await db.scalar(select(Book.id).where(Book.title_key == key)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Book already exists"
+            )
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Book already exists"
+            status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found"
         )
 
-    genre_name = payload.genre
-    genre = await get_genre_by_name(db, genre_name)
+    result = await db.execute(
+        pg_insert(Book)
+        .values(
+            **payload.model_dump(exclude={"authors", "genre"}),
+            genre_id=genre_id,
+            title_key=key,
+        )
+        .on_conflict_do_nothing(index_elements=[Book.title_key])
+        .returning(Book.id, Book.version)
+    )
+    row = result.first()
 
-    if not genre:
+    if row is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found"
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Book already exists"
         )
 
-    payload_author_names = payload.authors
-    authors = await get_or_create_authors(db, payload_author_names)
+    book_id, version = row
+    author_ids = await get_or_create_author_ids(db, payload.authors)
 
-    db_book = Book(
-        **payload.model_dump(exclude={"authors", "genre"}),
-        genre_id=genre.id,
-        authors=authors,
+    await db.execute(
+        insert(book_author_association).values(
+            [
+                {"book_id": book_id, "author_id": author_id}
+                for author_id in author_ids.values()
+            ]
+        )
     )
-    db.add(db_book)
+    authors = await read_book_authors(db, book_id)
     await db.commit()
-    await db.refresh(db_book)
 
     book_data = {
-        "id": db_book.id,
-        "title": db_book.title,
-        "description": db_book.description,
-        "published_year": db_book.published_year,
-        "genre_id": db_book.genre_id,
-        "genre": genre.name,
-        "authors": [author.name for author in authors],
+        "id": book_id,
+        "title": payload.title,
+        "description": payload.description,
+        "published_year": payload.published_year,
+        "genre_id": genre_id,
+        "genre": payload.genre,
+        "authors": authors,
+        "version": version,
     }
 
     return BookRead(**book_data)
 
 
+# The author names of a book, sorted by name: every response lists them in this
+# order, so one ETag (which only names the version) stands for one body.
+# Correlated to books only: the author sort joins authors in the outer query
+BOOK_AUTHORS_COLUMN = (
+    select(func.array_agg(aggregate_order_by(Author.name, Author.name)))
+    .join(book_author_association)
+    .where(book_author_association.c.book_id == Book.id)
+    .correlate(Book)
+    .scalar_subquery()
+    .label("authors")
+)
+
+# Every BookRead field of a book as a column: the genre name and the author
+# names (sorted) come from correlated subqueries, so any select of books can
+# return finished rows in one statement
+BOOK_READ_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.description,
+    Book.published_year,
+    Book.genre_id,
+    Book.version,
+    select(Genre.name)
+    .where(Genre.id == Book.genre_id)
+    .correlate(Book)
+    .scalar_subquery()
+    .label("genre"),
+    BOOK_AUTHORS_COLUMN,
+)
+
+
+async def read_book_authors(db: AsyncSession, book_id: int) -> list[str]:
+    """A book's author names, in the order the reads return them."""
+    return await db.scalar(select(BOOK_AUTHORS_COLUMN).where(Book.id == book_id)) or []
+
+
+def book_row_data(row: RowMapping) -> dict:
+    book_data = dict(row)
+    book_data["authors"] = book_data["authors"] or []
+    return book_data
+
+
+def book_from_row(row: RowMapping) -> BookRead:
+    # The row is read from the database, not sent by a client: build the
+    # model without validating it again
+    return BookRead.model_construct(**book_row_data(row))
+
+
 async def get_book(db: AsyncSession, book_id: int) -> BookRead:
+    """`read_book` through the result cache (see app.crud.book_cache)."""
+    if not settings.book_result_cache or books_changed_in(db):
+        return await read_book(db, book_id)
+
+    book = book_detail_cache.get(book_id)
+    if book is None:
+        # Read before loading: a write committed meanwhile makes the entry stale
+        generation = book_detail_cache.generation
+        book = await read_book(db, book_id)
+        book_detail_cache.set(book_id, book, generation)
+    return book
+
+
+async def read_book(db: AsyncSession, book_id: int) -> BookRead:
+    if settings.book_reads_core:
+        result = await db.execute(select(*BOOK_READ_COLUMNS).where(Book.id == book_id))
+        row = result.mappings().first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+            )
+        return book_from_row(row)
+
     result = await db.execute(
         select(Book)
         .where(Book.id == book_id)
@@ -75,6 +207,7 @@ async def get_book(db: AsyncSession, book_id: int) -> BookRead:
         "description": db_book.description,
         "published_year": db_book.published_year,
         "genre_id": db_book.genre_id,
+        "version": db_book.version,
         "genre": db_book.genre.name if db_book.genre else None,
         "authors": [author.name for author in db_book.authors],
     }
@@ -82,122 +215,776 @@ async def get_book(db: AsyncSession, book_id: int) -> BookRead:
     return BookRead(**book_data)
 
 
-async def update_book(db: AsyncSession, book_id: int, payload: BookCreate) -> BookRead:
-    result = await db.execute(
-        select(Book)
-        .where(Book.id == book_id)
-        .options(selectinload(Book.authors), selectinload(Book.genre))
-    )
-    db_book = result.scalars().first()
+async def get_book_version(db: AsyncSession, book_id: int) -> int:
+    if settings.book_result_cache and not books_changed_in(db):
+        book = book_detail_cache.get(book_id)
+        if book is not None:
+            return book.version
 
-    if not db_book:
+    version = await db.scalar(select(Book.version).where(Book.id == book_id))
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
+    return version
+
+
+def book_etag(book_id: int, version: int) -> str:
+    return f'"{book_id}-{version}"'
+
+
+def book_versions_from_etags(book_id: int, etags: list[str]) -> list[int]:
+    """The versions of `book_id` named by `etags`; ETags of other books are skipped."""
+    versions = []
+    for etag in etags:
+        tag_book_id, _, version = etag.strip('"').partition("-")
+        if tag_book_id == str(book_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+def books_etag(books: MultipleBooksResponse) -> str:
+    """
+    ETag of a book list: a hash of the versions of the books on the page and
+    of the other fields of the response. The highest version alone would miss
+    a book leaving the page or a change of the total.
+    """
+    page = [
+        books.total,
+        books.page,
+        books.size,
+        books.total_mode,
+        books.next_cursor,
+        [(book.id, book.version) for book in books.books],
+    ]
+    return f'"{hashlib.blake2b(json.dumps(page).encode(), digest_size=16).hexdigest()}"'
+
+
+async def update_book(
+    db: AsyncSession,
+    book_id: int,
+    payload: BookCreate,
+    expected_versions: list[int] | None = None,
+) -> BookRead:
+    # A full update is a patch that sets every field
+    return await patch_book(
+        db, book_id, BookUpdate(**payload.model_dump()), expected_versions
+    )
+
 
-    genre_name = payload.genre
-    genre = await get_genre_by_name(db, genre_name)
+async def set_book_authors(db: AsyncSession, book_id: int, author_names: list[str]) -> None:
+    """
+    Make `author_names` the authors of a book, writing only the links that change.
 
-    if not genre:
+    Links to authors no longer listed are deleted; the insert skips the links
+    that already exist, so unchanged authors cost no writes.
+    """
+    author_ids = list((await get_or_create_author_ids(db, author_names)).values())
+
+    await db.execute(
+        delete(book_author_association).where(
+            book_author_association.c.book_id == book_id,
+            book_author_association.c.author_id.not_in(author_ids),
+        )
+    )
+    await db.execute(
+        pg_insert(book_author_association)
+        .values([{"book_id": book_id, "author_id": author_id} for author_id in author_ids])
+        .on_conflict_do_nothing()
+    )
+
+
+async def patch_book(
+    db: AsyncSession,
+    book_id: int,
+    payload: BookUpdate,
+    expected_versions: list[int] | None = None,
+) -> BookRead:
+    """
+    Change the fields of a book that are set in `payload`.
+
+    One UPDATE sets the scalar fields and raises the version, and returns the
+    updated row along with its genre and author names; a title taken by
+    another book is refused by the unique title key. Authors are diffed
+    against the existing links by `set_book_authors`. An empty patch changes
+    nothing and returns the book as it is.
+
+    With `expected_versions` (from If-Match) the book is only changed while
+    its version is one of them, otherwise the response is 412.
+    """
+    values = payload.model_dump(exclude_unset=True)
+    author_names = values.pop("authors", None)
+
+    if "genre" in values:
+        genre_id = await get_genre_id_by_name(db, values.pop("genre"))
+        if not genre_id:
+            if not await db.scalar(select(Book.id).where(Book.id == book_id)):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found"
+            )
+        values["genre_id"] = genre_id
+
+    if "title" in values:
+        values["title_key"] = title_key(values["title"])
+
+    clauses = [Book.id == book_id]
+    if expected_versions is not None:
+        clauses.append(Book.version.in_(expected_versions))
+    if values or author_names is not None:
+        statement = (
+            update(Book)
+            .where(*clauses)
+            .values(**values, version=Book.version + 1)
+            .returning(*BOOK_READ_COLUMNS)
+            .execution_options(synchronize_session="fetch")
+        )
+    else:
+        # Nothing sent: the book, its version and the caches stay as they are
+        statement = select(*BOOK_READ_COLUMNS).where(*clauses)
+
+    try:
+        row = (await db.execute(statement)).mappings().first()
+    except IntegrityError as exc:
+        # The unique title key catches duplicates, even ones written concurrently
+        if not isinstance(exc.orig.__cause__, asyncpg.UniqueViolationError):
+            raise
+        await db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found"
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Book already exists"
+        )
+
+    if row is None:
+        if expected_versions is not None and await db.scalar(
+            select(Book.id).where(Book.id == book_id)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Book has been changed",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
 
-    payload_author_names = payload.authors
-    authors = await get_or_create_authors(db, payload_author_names)
+    book_data = book_row_data(row)
+    if author_names is not None:
+        author_names = list(dict.fromkeys(author_names))
+        await set_book_authors(db, book_id, author_names)
+        book_data["authors"] = await read_book_authors(db, book_id)
 
-    db_book.title = payload.title
-    db_book.description = payload.description
-    db_book.published_year = payload.published_year
-    db_book.genre_id = genre.id
-    db_book.authors = authors
+        # Written outside the unit of work; a loaded copy reloads its authors
+        book = db.identity_map.get(db.sync_session.identity_key(Book, book_id))
+        if book is not None:
+            db.expire(book, ["authors"])
 
-    db.add(db_book)
     await db.commit()
-    await db.refresh(db_book)
 
-    book_data = {
-        "id": db_book.id,
-        "title": db_book.title,
-        "description": db_book.description,
-        "published_year": db_book.published_year,
-        "genre_id": db_book.genre_id,
-        "genre": genre.name,
-        "authors": [author.name for author in authors],
-    }
+    return BookRead.model_construct(**book_data)
 
-    return BookRead(**book_data)
+
+def delete_books_statement(*clauses: ColumnElement[bool]):
+    """
+    One DELETE of the matching books, RETURNING their ids.
+
+    Their author links go with them through the ON DELETE CASCADE on
+    book_authors.book_id.
+    """
+    return (
+        delete(Book)
+        .where(*clauses)
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def expunge_deleted_books(db: AsyncSession, book_ids: list[int]) -> None:
+    # Deleted outside the unit of work, so drop the stale instances by hand
+    for book_id in book_ids:
+        book = db.identity_map.get(db.sync_session.identity_key(Book, book_id))
+        if book is not None:
+            db.expunge(book)
 
 
 async def delete_book(db: AsyncSession, book_id: int) -> None:
-    result = await db.execute(select(Book).where(Book.id == book_id))
-    db_book = result.scalars().first()
+    result = await db.execute(delete_books_statement(Book.id == book_id))
+    deleted_ids = result.scalars().all()
 
-    if not db_book:
+    if not deleted_ids:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
 
-    await db.delete(db_book)
+    expunge_deleted_books(db, deleted_ids)
     await db.commit()
 
 
 sort_by_literal = Literal["title", "year", "author"]
 
+SORT_KEYS = {"title": Book.title, "year": book_year_sort_key, "author": Author.name}
 
-async def get_books(
+
+async def book_filter_clauses(
     db: AsyncSession,
-    sort_by: sort_by_literal | None = None,
     title: str | None = None,
     author: str | None = None,
     genre: str | None = None,
     published_year_from: int | None = None,
     published_year_to: int | None = None,
-    limit: int = 5,
-    offset: int = 0,
-) -> MultipleBooksResponse:
-    query = select(Book).options(selectinload(Book.authors), selectinload(Book.genre))
+) -> list[ColumnElement[bool]] | None:
+    """
+    WHERE clauses on `Book` for the `get_books` filters.
+
+    Returns None when no book can match (an unknown genre). The author
+    filter is an EXISTS subquery, so the clauses work in UPDATE and DELETE
+    statements as well as in selects, and never duplicate rows.
+    """
+    clauses = []
 
     if title:
-        query = query.filter(Book.title.ilike(f"%{title}%"))
+        clauses.append(Book.title.ilike(f"%{title}%"))
 
     if genre:
-        query = query.join(Book.genre).filter(Genre.name == genre.lower())
+        genre_id = await get_genre_id_by_name(db, genre.lower())
+        if genre_id is None:
+            return None
+        clauses.append(Book.genre_id == genre_id)
 
     if author:
-        query = query.join(Book.authors).filter(Author.name.ilike(f"%{author}%"))
+        clauses.append(Book.authors.any(Author.name.ilike(f"%{author}%")))
 
     if published_year_from:
-        query = query.filter(Book.published_year >= published_year_from)
+        clauses.append(Book.published_year >= published_year_from)
 
     if published_year_to:
-        query = query.filter(Book.published_year <= published_year_to)
+        clauses.append(Book.published_year <= published_year_to)
+
+    return clauses
+
+
+def encode_cursor(sort_by: sort_by_literal | None, key, book_id: int) -> str:
+    token = json.dumps({"sort_by": sort_by, "key": key, "id": book_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
 
-    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+# The type of the sort key a cursor carries, by sort_by
+CURSOR_KEY_TYPES = {"title": str, "author": str, "year": int}
 
-    if sort_by == "title":
-        query = query.order_by(Book.title)
-    elif sort_by == "year":
-        query = query.order_by(Book.published_year)
-    elif sort_by == "author":
-        query = query.join(Book.authors).order_by(Author.name)
 
-    query = query.limit(limit).offset(offset * limit)
+def is_int4(value) -> bool:
+    return type(value) is int and -(2**31) <= value < 2**31
 
-    result = await db.execute(query)
-    db_books = result.scalars().unique().all()
 
-    books = [
-        BookRead(
-            id=book.id,
-            title=book.title,
-            description=book.description,
-            published_year=book.published_year,
-            genre_id=book.genre_id,
-            genre=book.genre.name if book.genre else None,
-            authors=[author.name for author in book.authors],
+def decode_cursor(cursor: str, sort_by: sort_by_literal | None) -> tuple:
+    """
+    Return the `(key, id)` of the row a cursor points after. Cursors are
+    client input, so the key must have the type of the sort's column (it is
+    ignored without a sort) before it gets anywhere near the database.
+    """
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key, book_id = token["key"], token["id"]
+        key_type = CURSOR_KEY_TYPES.get(sort_by)
+        valid = (
+            token["sort_by"] == sort_by
+            and is_int4(book_id)
+            and (
+                key_type is None
+                or (key_type is int and is_int4(key))
+                or (key_type is str and type(key) is str)
+            )
         )
-        for book in db_books
-    ]
+    except (ValueError, TypeError, KeyError):
+        valid = False
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return key, book_id
+
+
+def after_cursor(sort_key: ColumnElement | None, key, book_id: int) -> ColumnElement[bool]:
+    """
+    Rows that sort after `(key, book_id)` in `ORDER BY sort_key, id`.
+
+    Written as a row comparison, so it can be answered from the matching
+    `(sort key, id)` index. The plain lower bound on the key is redundant
+    except for authors, whose name is on another table than the id: it
+    lets the scan of the authors index start at the cursor.
+    """
+    if sort_key is None:
+        return Book.id > book_id
+    return and_(sort_key >= key, tuple_(sort_key, Book.id) > tuple_(key, book_id))
+
+
+# Exact totals of recent filters, for total_mode="cached"
+book_total_cache = LRUCache(
+    maxsize=settings.book_total_cache_size, ttl=settings.book_total_cache_ttl_seconds
+)
+
 
-    return MultipleBooksResponse(books=books, total=total, page=offset, size=limit)
+async def count_books(db: AsyncSession, clauses: list[ColumnElement[bool]]) -> int:
+    return await db.scalar(select(func.count()).select_from(Book).where(*clauses))
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a statement, which keeps its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Executable):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+async def estimate_books(db: AsyncSession, clauses: list[ColumnElement[bool]]) -> int | None:
+    """
+    The planner's estimate of how many books match, without scanning them.
+
+    Unfiltered, this is `pg_class.reltuples`; filtered, the row estimate of
+    the query plan. Returns None while the table has never been analyzed.
+    """
+    if not clauses:
+        reltuples = await db.scalar(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": Book.__tablename__},
+        )
+        return int(reltuples) if reltuples is not None and reltuples >= 0 else None
+
+    # The filter values are sent as parameters, which the planner still sees
+    plan = await db.scalar(Explain(select(Book.id).where(*clauses)))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def book_total_cache_key(
+    title: str | None,
+    author: str | None,
+    genre: str | None,
+    published_year_from: int | None,
+    published_year_to: int | None,
+) -> tuple:
+    # Falsy filters are ignored and text filters match case-insensitively
+    return (
+        title.lower() if title else None,
+        author.lower() if author else None,
+        genre.lower() if genre else None,
+        published_year_from or None,
+        published_year_to or None,
+    )
+
+
+async def get_books(
+    db: AsyncSession,
+    sort_by: sort_by_literal | None = None,
+    title: str | None = None,
+    author: str | None = None,
+    genre: str | None = None,
+    published_year_from: int | None = None,
+    published_year_to: int | None = None,
+    limit: int = 5,
+    offset: int = 0,
+    total_mode: total_mode_literal = "exact",
+    cursor: str | None = None,
+) -> MultipleBooksResponse:
+    """
+    `read_books` through the result cache (see app.crud.book_cache). Pages of
+    more than `book_list_cache_max_books` books are not cached. Concurrent
+    misses of the same page share one read (`book_read_coalescing`).
+    """
+    params = {
+        "sort_by": sort_by,
+        "title": title,
+        "author": author,
+        "genre": genre,
+        "published_year_from": published_year_from,
+        "published_year_to": published_year_to,
+        "limit": limit,
+        "offset": offset,
+        "total_mode": total_mode,
+        "cursor": cursor,
+    }
+    if books_changed_in(db):
+        # Shared results would not show the session's own uncommitted writes
+        return await read_books(db, **params)
+
+    cache_key = tuple(params.values())
+    cacheable = (
+        settings.book_result_cache and limit <= settings.book_list_cache_max_books
+    )
+    if cacheable:
+        books = book_list_cache.get(cache_key)
+        if books is not None:
+            return books
+
+    async def load() -> MultipleBooksResponse:
+        generation = book_list_cache.generation
+        books = await read_books(db, **params)
+        if cacheable:
+            book_list_cache.set(cache_key, books, generation)
+        return books
+
+    if not settings.book_read_coalescing:
+        return await load()
+    # The generation is part of the key, so requests made after a write never
+    # wait for a read that started before it
+    return await book_read_flights.do(
+        ("list", book_list_cache.generation, cache_key), load
+    )
+
+
+async def read_books(
+    db: AsyncSession,
+    sort_by: sort_by_literal | None = None,
+    title: str | None = None,
+    author: str | None = None,
+    genre: str | None = None,
+    published_year_from: int | None = None,
+    published_year_to: int | None = None,
+    limit: int = 5,
+    offset: int = 0,
+    total_mode: total_mode_literal = "exact",
+    cursor: str | None = None,
+) -> MultipleBooksResponse:
+    """
+    A page of books matching the filters, with the number of matches.
+
+    `total_mode` picks how that number is computed: "exact" counts the
+    matching rows, "estimated" takes the planner's estimate (see
+    `estimate_books`) and "cached" reuses an exact count of the same filters
+    made in the last `book_total_cache_ttl_seconds`. When an estimate or a
+    cached count is not available the total is counted, and the response's
+    `total_mode` says "exact".
+
+    With `book_reads_core` each row, genre and authors included, comes
+    from one Core select (see `BOOK_READ_COLUMNS`) instead of ORM objects
+    and two select-in loads. Pages are ordered by the sort key, then id. Passing the `next_cursor` of
+    the previous page continues right after its last row (keyset
+    pagination) and `offset` is ignored; without a cursor `offset` counts
+    pages of `limit` books as before.
+    """
+    clauses = await book_filter_clauses(
+        db,
+        title=title,
+        author=author,
+        genre=genre,
+        published_year_from=published_year_from,
+        published_year_to=published_year_to,
+    )
+    if clauses is None:
+        return MultipleBooksResponse(
+            books=[], total=0, page=offset, size=limit, total_mode="exact"
+        )
+
+    total = None
+    if total_mode == "estimated":
+        total = await estimate_books(db, clauses)
+    elif total_mode == "cached":
+        cache_key = book_total_cache_key(
+            title, author, genre, published_year_from, published_year_to
+        )
+        total = book_total_cache.get(cache_key)
+    if total is None:
+        total = await count_books(db, clauses)
+        if total_mode == "cached":
+            book_total_cache.set(cache_key, total)
+        total_mode = "exact"
+
+    sort_key = SORT_KEYS.get(sort_by)
+    key_column = (sort_key if sort_key is not None else Book.id).label("sort_key")
+    if settings.book_reads_core:
+        query = select(*BOOK_READ_COLUMNS, key_column)
+    else:
+        query = select(Book, key_column).options(
+            selectinload(Book.authors), selectinload(Book.genre)
+        )
+    query = query.where(*clauses)
+    if sort_by == "author":
+        query = query.join(Book.authors)
+    if sort_key is not None:
+        query = query.order_by(sort_key, Book.id)
+    else:
+        query = query.order_by(Book.id)
+
+    if cursor:
+        query = query.where(after_cursor(sort_key, *decode_cursor(cursor, sort_by)))
+    else:
+        query = query.offset(offset * limit)
+
+    # One row more than the page tells whether there is a next one
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # limit=0 asks for an empty page, which has nothing to continue from
+        if rows:
+            last_id = rows[-1].id if settings.book_reads_core else rows[-1].Book.id
+            next_cursor = encode_cursor(sort_by, rows[-1].sort_key, last_id)
+
+    # Sorting by author lists a book once per author; keep its first row
+    if settings.book_reads_core:
+        book_rows = {row.id: row._mapping for row in rows}
+        books = [book_from_row(row) for row in book_rows.values()]
+    else:
+        db_books = list({row.Book.id: row.Book for row in rows}.values())
+        books = [
+            BookRead(
+                id=book.id,
+                title=book.title,
+                description=book.description,
+                published_year=book.published_year,
+                genre_id=book.genre_id,
+                version=book.version,
+                genre=book.genre.name if book.genre else None,
+                authors=[author.name for author in book.authors],
+            )
+            for book in db_books
+        ]
+
+    return MultipleBooksResponse(
+        books=books,
+        total=total,
+        page=offset,
+        size=limit,
+        total_mode=total_mode,
+        next_cursor=next_cursor,
+    )
+
+
+async def get_books_by_ids(db: AsyncSession, book_ids: list[int]) -> BooksBatchResponse:
+    """
+    The books with the given ids, in the order asked for, and the ids that do
+    not exist.
+
+    Books in the detail cache are taken from it; the rest are read with one
+    `id = ANY(:ids)` select (authors and genre included, see
+    `BOOK_READ_COLUMNS`) and put in the cache for `get_book`.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    if len(book_ids) > settings.book_batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.book_batch_max_ids} books can be fetched at once",
+        )
+
+    use_cache = settings.book_result_cache and not books_changed_in(db)
+    books: dict[int, BookRead] = {}
+    if use_cache:
+        for book_id in book_ids:
+            book = book_detail_cache.get(book_id)
+            if book is not None:
+                books[book_id] = book
+
+    missing = [book_id for book_id in book_ids if book_id not in books]
+    if missing:
+        generation = book_detail_cache.generation
+        ids = bindparam("ids", missing, type_=ARRAY(Integer))
+        if settings.book_reads_core:
+            result = await db.execute(
+                select(*BOOK_READ_COLUMNS).where(Book.id == any_(ids))
+            )
+            read = [book_from_row(row) for row in result.mappings()]
+        else:
+            result = await db.execute(
+                select(Book)
+                .where(Book.id == any_(ids))
+                .options(selectinload(Book.authors), selectinload(Book.genre))
+            )
+            read = [
+                BookRead(
+                    id=book.id,
+                    title=book.title,
+                    description=book.description,
+                    published_year=book.published_year,
+                    genre_id=book.genre_id,
+                    version=book.version,
+                    genre=book.genre.name if book.genre else None,
+                    authors=[author.name for author in book.authors],
+                )
+                for book in result.scalars()
+            ]
+        for book in read:
+            books[book.id] = book
+            if use_cache:
+                book_detail_cache.set(book.id, book, generation)
+
+    return BooksBatchResponse(
+        books=[books[book_id] for book_id in book_ids if book_id in books],
+        missing_ids=[book_id for book_id in book_ids if book_id not in books],
+    )
+
+
+async def bulk_update_books(
+    db: AsyncSession, payload: BulkUpdateRequest
+) -> BulkUpdateResponse:
+    """
+    Apply one patch to every book matching `ids` or `filter`.
+
+    Runs as a single UPDATE ... RETURNING in one transaction. With `dry_run`
+    only the matching books are counted. A filter matching more than
+    `bulk_update_max_rows` books is refused before anything is written.
+    """
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either ids or filter is required",
+        )
+
+    if payload.ids is not None and len(payload.ids) > settings.bulk_update_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.bulk_update_max_rows} ids can be updated at once",
+        )
+
+    values = payload.patch.model_dump(exclude_unset=True)
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Nothing to update"
+        )
+
+    if "genre" in values:
+        genre_id = await get_genre_id_by_name(db, values.pop("genre") or "")
+        if not genre_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found"
+            )
+        values["genre_id"] = genre_id
+
+    if payload.ids is not None:
+        clauses = [Book.id.in_(payload.ids)]
+    else:
+        clauses = await book_filter_clauses(db, **payload.filter.model_dump())
+    if clauses is None:
+        return BulkUpdateResponse(matched=0, dry_run=payload.dry_run, ids=[])
+
+    if payload.dry_run:
+        matched = await db.scalar(select(func.count()).select_from(Book).where(*clauses))
+        return BulkUpdateResponse(matched=matched, dry_run=True, ids=[])
+
+    if payload.filter is not None:
+        # Counting stops past the cap, so a huge match costs no more than that
+        matching = select(Book.id).where(*clauses).limit(settings.bulk_update_max_rows + 1)
+        matched = await db.scalar(select(func.count()).select_from(matching.subquery()))
+        if matched > settings.bulk_update_max_rows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Update matches more than the limit of "
+                    f"{settings.bulk_update_max_rows} books"
+                ),
+            )
+
+    result = await db.execute(
+        update(Book)
+        .where(*clauses)
+        .values(**values, version=Book.version + 1)
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+    book_ids = list(result.scalars().all())
+
+    # Books inserted since the count may still push it over
+    if len(book_ids) > settings.bulk_update_max_rows:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Update matches {len(book_ids)} books, "
+                f"more than the limit of {settings.bulk_update_max_rows}"
+            ),
+        )
+
+    await db.commit()
+    return BulkUpdateResponse(matched=len(book_ids), dry_run=False, ids=book_ids)
+
+
+async def bulk_delete_books(
+    db: AsyncSession, payload: BulkDeleteRequest
+) -> BulkDeleteResponse:
+    """
+    Delete every book matching `ids` or `filter`, with its author links.
+
+    Requests matching more than `bulk_delete_max_rows` books are refused
+    before anything is deleted. The rest is deleted `bulk_delete_chunk_size`
+    books at a time, one DELETE ... RETURNING and one commit per chunk, so a
+    large delete never holds its locks for long. Requested ids that did not
+    exist are reported in `missing_ids`.
+    """
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either ids or filter is required",
+        )
+
+    if payload.ids is not None:
+        book_ids = list(dict.fromkeys(payload.ids))
+        if len(book_ids) > settings.bulk_delete_max_rows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.bulk_delete_max_rows} ids can be deleted at once",
+            )
+        if payload.dry_run:
+            result = await db.execute(select(Book.id).where(Book.id.in_(book_ids)))
+            found = set(result.scalars().all())
+            return BulkDeleteResponse(
+                deleted=len(found),
+                dry_run=True,
+                ids=[],
+                missing_ids=[book_id for book_id in book_ids if book_id not in found],
+            )
+
+        deleted_ids = []
+        for start in range(0, len(book_ids), settings.bulk_delete_chunk_size):
+            chunk = book_ids[start : start + settings.bulk_delete_chunk_size]
+            result = await db.execute(delete_books_statement(Book.id.in_(chunk)))
+            chunk_ids = result.scalars().all()
+            expunge_deleted_books(db, chunk_ids)
+            await db.commit()
+            deleted_ids.extend(chunk_ids)
+
+        deleted = set(deleted_ids)
+        return BulkDeleteResponse(
+            deleted=len(deleted_ids),
+            dry_run=False,
+            ids=deleted_ids,
+            missing_ids=[book_id for book_id in book_ids if book_id not in deleted],
+        )
+
+    clauses = await book_filter_clauses(db, **payload.filter.model_dump())
+    if clauses is None:
+        return BulkDeleteResponse(deleted=0, dry_run=payload.dry_run, ids=[], missing_ids=[])
+
+    matched = await db.scalar(select(func.count()).select_from(Book).where(*clauses))
+    if payload.dry_run:
+        return BulkDeleteResponse(deleted=matched, dry_run=True, ids=[], missing_ids=[])
+    if matched > settings.bulk_delete_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Delete matches {matched} books, "
+                f"more than the limit of {settings.bulk_delete_max_rows}"
+            ),
+        )
+
+    deleted_ids = []
+    while True:
+        chunk = select(Book.id).where(*clauses).limit(settings.bulk_delete_chunk_size)
+        result = await db.execute(delete_books_statement(Book.id.in_(chunk)))
+        chunk_ids = result.scalars().all()
+        expunge_deleted_books(db, chunk_ids)
+        await db.commit()
+        deleted_ids.extend(chunk_ids)
+        if len(chunk_ids) < settings.bulk_delete_chunk_size:
+            break
+
+    return BulkDeleteResponse(
+        deleted=len(deleted_ids), dry_run=False, ids=deleted_ids, missing_ids=[]
+    )
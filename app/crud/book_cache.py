@@ -0,0 +1,93 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import GenerationCache
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.session_info import discard_on_rollback
+from app.core.singleflight import SingleFlight
+from app.models.author import Author
+from app.models.book import Book, book_author_association
+from app.models.genre import Genre
+
+# Results of get_book (by id) and get_books (by canonical parameters), shared
+# by every request in the process. A commit that changed books bumps both
+# generations, here and, through the invalidation bus, in other processes.
+book_detail_cache = GenerationCache(
+    maxsize=settings.book_detail_cache_size, ttl=settings.book_detail_cache_ttl_seconds
+)
+book_list_cache = GenerationCache(
+    maxsize=settings.book_list_cache_size, ttl=settings.book_list_cache_ttl_seconds
+)
+
+# Identical book list and search reads running at the same time share one query
+book_read_flights = SingleFlight()
+
+_BOOKS_CHANGED = discard_on_rollback("books_changed")
+_BOOK_TABLES = {Book.__table__, book_author_association}
+# Authors and genres show up in book results; deleting a genre or an author
+# also deletes books or links in the database, unseen by the session
+_BOOK_RESULT_MODELS = (Book, Author, Genre)
+
+
+def book_cache_stats() -> dict:
+    return {
+        "detail": book_detail_cache.stats(),
+        "list": book_list_cache.stats(),
+        "flights": {
+            **book_read_flights.stats,
+            "coalescing_rate": book_read_flights.coalescing_rate(),
+        },
+    }
+
+
+def clear_book_caches() -> None:
+    book_detail_cache.clear()
+    book_list_cache.clear()
+
+
+def _bump_book_caches(keys: list | None = None) -> None:
+    book_detail_cache.bump()
+    book_list_cache.bump()
+
+
+invalidation_bus.register("books", _bump_book_caches)
+
+
+def mark_books_changed(db: AsyncSession | Session) -> None:
+    """
+    Invalidate the cached book results once the transaction commits. Writes
+    through the session are noticed on their own; writes that bypass it
+    (COPY) call this.
+    """
+    db.info[_BOOKS_CHANGED] = True
+    invalidation_bus.publish(db, "books")
+
+
+def books_changed_in(db: AsyncSession | Session) -> bool:
+    """Whether the session's open transaction has written books."""
+    return db.info.get(_BOOKS_CHANGED, False)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _book_statement_executed(orm_execute_state):
+    state = orm_execute_state
+    if (state.is_insert or state.is_update or state.is_delete) and (
+        state.statement.table in _BOOK_TABLES
+    ):
+        mark_books_changed(state.session)
+
+
+@event.listens_for(Session, "after_flush")
+def _book_objects_flushed(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _BOOK_RESULT_MODELS):
+            mark_books_changed(session)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_book_caches(session):
+    if session.info.pop(_BOOKS_CHANGED, False):
+        _bump_book_caches()
@@ -0,0 +1,313 @@
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+)
+
+import asyncpg
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.json_stream import JSONStreamError
+from app.crud.author import get_or_create_author_ids
+from app.crud.book_cache import mark_books_changed
+from app.crud.genre import get_genre_id_by_name
+from app.models.book import Book, book_author_association, title_key
+from app.schemas.book import BookCreate, BookRead, BulkUploadError
+
+BOOK_COLUMNS = ("id", "title", "title_key", "description", "published_year", "genre_id")
+
+Checkpoint = Callable[[list[BookRead], list[BulkUploadError]], Awaitable[None]]
+ChunkCheckpoint = Callable[[int, list[BookRead], list[BulkUploadError]], Awaitable[None]]
+
+# Author names are resolved in slices so the upsert stays well below the
+# 32767 bind parameters a Postgres statement may carry
+AUTHOR_SLICE_SIZE = 5000
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def copy_records(
+    db: AsyncSession, table: str, columns: Iterable[str], records: list[tuple]
+) -> None:
+    # COPY goes straight to the asyncpg connection, inside the transaction the
+    # session already has open on it
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    mark_books_changed(db)
+    await raw_connection.driver_connection.copy_records_to_table(
+        table, records=records, columns=list(columns)
+    )
+
+
+async def allocate_book_ids(db: AsyncSession, count: int) -> list[int]:
+    sequence = func.pg_get_serial_sequence(Book.__tablename__, "id")
+    result = await db.execute(
+        select(func.nextval(sequence)).select_from(func.generate_series(1, count))
+    )
+    return list(result.scalars().all())
+
+
+def validate_chunk(
+    items: list[tuple[int, Any]],
+) -> tuple[list[tuple[int, str, BookCreate]], list[BulkUploadError]]:
+    """
+    Validate `(index, item)` pairs into `(index, title_key, payload)`,
+    dropping titles repeated within the chunk.
+
+    Titles from earlier chunks are already committed and are caught by the
+    database check in `write_chunk`, so nothing is kept across chunks. Pure
+    CPU work, so callers run it in the threadpool.
+    """
+    seen_keys = set()
+    errors = []
+    payloads: list[tuple[int, str, BookCreate]] = []
+    for index, item in items:
+        if not isinstance(item, dict):
+            errors.append(
+                BulkUploadError(index=index, detail="Each book entry must be a JSON object.")
+            )
+            continue
+        try:
+            payload = BookCreate(**item)
+        except ValidationError as exc:
+            errors.append(
+                BulkUploadError(
+                    index=index,
+                    title=str(item["title"]) if "title" in item else None,
+                    detail=format_validation_error(exc),
+                )
+            )
+            continue
+        key = title_key(payload.title)
+        if key in seen_keys:
+            errors.append(
+                BulkUploadError(
+                    index=index, title=payload.title, detail="Duplicate title in upload"
+                )
+            )
+            continue
+        seen_keys.add(key)
+        payloads.append((index, key, payload))
+    return payloads, errors
+
+
+async def write_chunk(
+    db: AsyncSession,
+    payloads: list[tuple[int, str, BookCreate]],
+    errors: list[BulkUploadError],
+) -> list[BookRead]:
+    """
+    Write validated `(index, title_key, payload)` rows in the current transaction.
+
+    Rows whose title key is already taken or that name an unknown genre are
+    added to `errors` and skipped; the rest are written with COPY. If the
+    write itself fails it is rolled back and every row is reported. Does not
+    commit.
+    """
+    if not payloads:
+        return []
+
+    result = await db.execute(
+        select(Book.title_key).where(Book.title_key.in_([key for _, key, _ in payloads]))
+    )
+    existing_keys = set(result.scalars().all())
+
+    genre_ids = {}
+    for genre in {payload.genre for _, _, payload in payloads}:
+        genre_ids[genre] = await get_genre_id_by_name(db, genre)
+
+    rows = []
+    for index, key, payload in payloads:
+        if key in existing_keys:
+            detail = "Book already exists"
+        elif not genre_ids[payload.genre]:
+            detail = "Genre not found"
+        else:
+            rows.append((index, key, payload))
+            continue
+        errors.append(BulkUploadError(index=index, title=payload.title, detail=detail))
+
+    if not rows:
+        return []
+
+    try:
+        author_names = list(
+            dict.fromkeys(name for _, _, payload in rows for name in payload.authors)
+        )
+        author_ids = {}
+        for names in chunked(author_names, AUTHOR_SLICE_SIZE):
+            author_ids.update(await get_or_create_author_ids(db, names))
+
+        book_ids = await allocate_book_ids(db, len(rows))
+        await copy_records(
+            db,
+            Book.__tablename__,
+            BOOK_COLUMNS,
+            [
+                (
+                    book_id,
+                    payload.title,
+                    key,
+                    payload.description,
+                    payload.published_year,
+                    genre_ids[payload.genre],
+                )
+                for book_id, (_, key, payload) in zip(book_ids, rows)
+            ],
+        )
+        await copy_records(
+            db,
+            book_author_association.name,
+            ("book_id", "author_id"),
+            [
+                (book_id, author_ids[name])
+                for book_id, (_, _, payload) in zip(book_ids, rows)
+                for name in dict.fromkeys(payload.authors)
+            ],
+        )
+    except (DBAPIError, asyncpg.PostgresError) as exc:
+        await db.rollback()
+        detail = f"Chunk rolled back: {getattr(exc, 'orig', exc)}"
+        errors.extend(
+            BulkUploadError(index=index, title=payload.title, detail=detail)
+            for index, _, payload in rows
+        )
+        return []
+
+    return [
+        BookRead(
+            id=book_id,
+            genre_id=genre_ids[payload.genre],
+            # The column's server default, COPY leaves it out
+            version=1,
+            **payload.model_dump(),
+        )
+        for book_id, (_, _, payload) in zip(book_ids, rows)
+    ]
+
+
+async def import_chunk(
+    db: AsyncSession,
+    items: list[tuple[int, Any]],
+    checkpoint: Checkpoint | None = None,
+) -> tuple[list[BookRead], list[BulkUploadError]]:
+    """
+    Validate one chunk of `(index, item)` pairs off the event loop and store it.
+
+    `checkpoint(created, errors)` runs in the chunk's transaction right
+    before the commit, so whatever it records is committed together with
+    the rows, or not at all.
+    """
+    payloads, errors = await run_in_threadpool(validate_chunk, items)
+    created = await write_chunk(db, payloads, errors)
+    errors.sort(key=lambda error: error.index)
+    if checkpoint:
+        await checkpoint(created, errors)
+    await db.commit()
+    return created, errors
+
+
+async def iter_import_chunks(
+    db: AsyncSession,
+    items: AsyncIterable[Any],
+    chunk_size: int | None = None,
+    skip_rows: int = 0,
+    checkpoint: ChunkCheckpoint | None = None,
+) -> AsyncIterator[tuple[int, list[BookRead], list[BulkUploadError]]]:
+    """
+    Import entries from an async iterable, yielding after every chunk.
+
+    Yields `(rows, created, errors)` per chunk, where `rows` is the number
+    of entries the chunk consumed. The first `skip_rows` entries are parsed
+    and dropped without touching the database, to resume an import from a
+    checkpoint. `checkpoint(rows, created, errors)` is committed together
+    with each chunk. A decoding error in the upload ends the import and is
+    reported as an error at the position where it happened.
+    """
+    chunk_size = chunk_size or settings.bulk_upload_chunk_size
+    iterator = aiter(items)
+    index = 0
+    done = False
+    while not done:
+        chunk = []
+        decode_errors = []
+        while len(chunk) < chunk_size:
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                done = True
+                break
+            except JSONStreamError as exc:
+                decode_errors.append(BulkUploadError(index=index, detail=str(exc)))
+                done = True
+                break
+            if index >= skip_rows:
+                chunk.append((index, item))
+            index += 1
+
+        if not chunk and not decode_errors:
+            continue
+
+        async def record(created, errors):
+            if checkpoint:
+                await checkpoint(len(chunk), created, errors + decode_errors)
+
+        if chunk:
+            created, errors = await import_chunk(db, chunk, record)
+        else:
+            created, errors = [], []
+            await record(created, errors)
+            await db.commit()
+        yield len(chunk), created, errors + decode_errors
+
+
+async def stream_import_books(
+    db: AsyncSession,
+    items: AsyncIterable[Any],
+    chunk_size: int | None = None,
+    max_errors: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    Import entries from an async iterable and yield the response JSON in pieces.
+
+    Produces a `BulkUploadResponse` document, with created books written out
+    after every chunk instead of being collected, and only the first
+    `max_errors` errors kept (`error_count` has the full number).
+    """
+    max_errors = max_errors or settings.bulk_upload_max_errors
+    errors: list[BulkUploadError] = []
+    error_count = 0
+    separator = ""
+
+    yield '{"created":['
+    async for _, created, chunk_errors in iter_import_chunks(db, items, chunk_size):
+        error_count += len(chunk_errors)
+        errors.extend(chunk_errors[: max(max_errors - len(errors), 0)])
+        if created:
+            yield separator + ",".join(book.model_dump_json() for book in created)
+            separator = ","
+
+    yield '],"errors":['
+    yield ",".join(error.model_dump_json() for error in errors)
+    yield f'],"error_count":{error_count}}}'
@@ -2,12 +2,36 @@ from sqlalchemy import select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
+from app.crud.book import BOOK_READ_COLUMNS, book_from_row
+from app.crud.book_cache import book_list_cache, book_read_flights, books_changed_in
 from app.models import Author, Book
 from app.schemas.book import BookRead
 
 
 async def search_books(db: AsyncSession, query: str) -> list[BookRead]:
     q = query.lower().strip()
+    if not settings.book_read_coalescing or books_changed_in(db):
+        return await find_books(db, q)
+    # Concurrent searches for the same term share one query, see get_books
+    return await book_read_flights.do(
+        ("search", book_list_cache.generation, q), lambda: find_books(db, q)
+    )
+
+
+async def find_books(db: AsyncSession, q: str) -> list[BookRead]:
+    if settings.book_reads_core:
+        stmt = select(*BOOK_READ_COLUMNS).where(
+            or_(
+                Book.title.ilike(f"%{q}%"),
+                func.similarity(Book.title, q) > 0.3,
+                Book.authors.any(
+                    or_(Author.name.ilike(f"%{q}%"), func.similarity(Author.name, q) > 0.3)
+                ),
+            )
+        )
+        result = await db.execute(stmt)
+        return [book_from_row(row) for row in result.mappings()]
 
     stmt = (
         select(Book)
@@ -33,6 +57,7 @@ async def search_books(db: AsyncSession, query: str) -> list[BookRead]:
             description=book.description,
             published_year=book.published_year,
             genre_id=book.genre_id,
+            version=book.version,
             genre=book.genre.name if book.genre else None,
             authors=[a.name for a in book.authors],
         )
@@ -1,9 +1,84 @@
-from sqlalchemy import select
+import time
+
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
 from app.models.genre import Genre
 
+# A name missing from a fresh cache triggers a reload at most this often, so a
+# genre created by another process shows up quickly without letting requests
+# for unknown genres hammer the database.
+MISS_RELOAD_INTERVAL = 1.0
+
+
+class GenreCache:
+    """
+    Process-wide name <-> id map of the genres table.
+
+    The table is tiny and rarely changes, so it is loaded whole at startup and
+    again when the TTL expires or `invalidate()` is called. Genre writes made
+    through the ORM in this process invalidate it automatically.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.ids_by_name: dict[str, int] = {}
+        self.names_by_id: dict[int, str] = {}
+        self.loaded_at: float | None = None
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def load(self, db: AsyncSession) -> None:
+        result = await db.execute(select(Genre.id, Genre.name))
+        rows = result.all()
+        self.ids_by_name = {name: genre_id for genre_id, name in rows}
+        self.names_by_id = {genre_id: name for genre_id, name in rows}
+        self.loaded_at = time.monotonic()
+
+    async def get_id(self, db: AsyncSession, name: str) -> int | None:
+        if not self.is_fresh():
+            await self.load(db)
+
+        genre_id = self.ids_by_name.get(name)
+        if genre_id is None and time.monotonic() - self.loaded_at > MISS_RELOAD_INTERVAL:
+            await self.load(db)
+            genre_id = self.ids_by_name.get(name)
+        return genre_id
+
+
+genre_cache = GenreCache(ttl=settings.genre_cache_ttl_seconds)
+invalidation_bus.register("genres", lambda keys: genre_cache.invalidate())
+
+
+@event.listens_for(Genre, "after_insert")
+@event.listens_for(Genre, "after_update")
+@event.listens_for(Genre, "after_delete")
+def _genre_changed(mapper, connection, target):
+    genre_cache.invalidate()
+    # Invalidate again on commit, in case a reload ran before the change was visible
+    session = object_session(target)
+    if session is not None:
+        session.info["genre_cache_stale"] = True
+        invalidation_bus.publish(session, "genres")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_genre_cache(session):
+    if session.info.pop("genre_cache_stale", False):
+        genre_cache.invalidate()
+
 
 async def get_genre_by_name(db: AsyncSession, name: str) -> Genre | None:
     result = await db.execute(select(Genre).filter(Genre.name == name))
     return result.scalars().first()
+
+
+async def get_genre_id_by_name(db: AsyncSession, name: str) -> int | None:
+    return await genre_cache.get_id(db, name)
@@ -0,0 +1,356 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.json_stream import STREAM_FORMATS, JSONStreamError
+from app.crud.book_import import iter_import_chunks
+from app.models.import_job import ImportJob, ImportJobBlock
+from app.schemas.import_job import ImportJobRead
+
+# First key of the advisory lock that serializes claims per user
+IMPORT_JOB_LOCK = 7401
+
+# Queued files are stored in import_job_blocks in blocks of this size
+IMPORT_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_upload(upload: BinaryIO) -> str:
+    """The sha256 of a seekable upload, read from the start."""
+    content_hash = hashlib.sha256()
+    upload.seek(0)
+    while block := upload.read(IMPORT_BLOCK_SIZE):
+        content_hash.update(block)
+    upload.seek(0)
+    return content_hash.hexdigest()
+
+
+async def store_upload(db: AsyncSession, job_id: int, upload: BinaryIO) -> None:
+    """Replace a job's stored file with `upload`, in the current transaction."""
+    await remove_upload(db, job_id)
+    upload.seek(0)
+    seq = 0
+    while block := await run_in_threadpool(upload.read, IMPORT_BLOCK_SIZE):
+        await db.execute(insert(ImportJobBlock).values(job_id=job_id, seq=seq, data=block))
+        seq += 1
+
+
+async def remove_upload(db: AsyncSession, job_id: int) -> None:
+    await db.execute(delete(ImportJobBlock).where(ImportJobBlock.job_id == job_id))
+
+
+def stored_upload_reader(db: AsyncSession, job_id: int):
+    """
+    A `read(size)` over a job's stored file. Each call returns the next whole
+    block (up to IMPORT_BLOCK_SIZE, whatever `size` asks for), fetched on `db`.
+    """
+    seq = 0
+
+    async def read(size: int) -> bytes:
+        nonlocal seq
+        block = await db.scalar(
+            select(ImportJobBlock.data).where(
+                ImportJobBlock.job_id == job_id, ImportJobBlock.seq == seq
+            )
+        )
+        seq += 1
+        return block or b""
+
+    return read
+
+
+async def open_import_stream(read, file_format: str):
+    items = STREAM_FORMATS[file_format](read)
+    await items.start()
+    return items
+
+
+def import_job_read(job: ImportJob) -> ImportJobRead:
+    rows_per_second = None
+    if job.started_at:
+        finished_at = job.finished_at or datetime.now(timezone.utc)
+        elapsed = (finished_at - job.started_at).total_seconds()
+        rows_per_second = job.rows_processed / elapsed if elapsed > 0 else None
+
+    return ImportJobRead(
+        id=job.id,
+        status=job.status,
+        filename=job.filename,
+        rows_processed=job.rows_processed,
+        rows_created=job.rows_created,
+        error_count=job.error_count,
+        errors=job.errors,
+        detail=job.detail,
+        rows_per_second=rows_per_second,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+async def create_import_job(
+    db: AsyncSession,
+    user_id: int,
+    upload: BinaryIO,
+    filename: str,
+    file_format: str,
+    idempotency_key: str | None = None,
+) -> ImportJobRead:
+    """
+    Store an upload in the database and queue it for the import workers.
+
+    The start of the file is checked first, so an upload that is not a list
+    of books is rejected right away instead of failing in the background.
+
+    Jobs are identified by the client's idempotency key or, without one, by
+    the file's sha256. Submitting a queued, running or completed job again
+    returns it unchanged; submitting a failed one queues it again, and it
+    resumes after the last committed chunk.
+    """
+    async def read(size: int) -> bytes:
+        return await run_in_threadpool(upload.read, size)
+
+    try:
+        await open_import_stream(read, file_format)
+    except JSONStreamError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    content_hash = await run_in_threadpool(hash_upload, upload)
+
+    job_key = idempotency_key or f"sha256:{content_hash}"
+    result = await db.execute(
+        pg_insert(ImportJob)
+        .values(
+            user_id=user_id,
+            status="queued",
+            filename=filename,
+            file_format=file_format,
+            job_key=job_key,
+            content_hash=content_hash,
+            rows_processed=0,
+            rows_created=0,
+            error_count=0,
+            errors=[],
+            attempts=0,
+        )
+        .on_conflict_do_nothing(index_elements=[ImportJob.user_id, ImportJob.job_key])
+        .returning(ImportJob.id)
+    )
+    job_id = result.scalar()
+    if job_id is not None:
+        await store_upload(db, job_id, upload)
+    else:
+        # Seen before: lock the existing job so a worker can't finish it under us
+        result = await db.execute(
+            select(ImportJob)
+            .where(ImportJob.user_id == user_id, ImportJob.job_key == job_key)
+            .with_for_update()
+        )
+        job = result.scalars().one()
+        if job.content_hash != content_hash:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Idempotency key was already used for a different file",
+            )
+        if job.status == "failed":
+            job.status = "queued"
+            job.file_format = file_format
+            job.detail = None
+            job.finished_at = None
+            job.attempts = 0
+            await store_upload(db, job.id, upload)
+
+    await db.commit()
+    result = await db.execute(
+        select(ImportJob)
+        .where(ImportJob.user_id == user_id, ImportJob.job_key == job_key)
+        .execution_options(populate_existing=True)
+    )
+    return import_job_read(result.scalars().one())
+
+
+async def get_import_job(db: AsyncSession, job_id: int, user_id: int) -> ImportJobRead:
+    result = await db.execute(
+        select(ImportJob).where(ImportJob.id == job_id, ImportJob.user_id == user_id)
+    )
+    job = result.scalars().first()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found"
+        )
+
+    return import_job_read(job)
+
+
+def stale_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.import_job_stale_seconds)
+
+
+async def claim_import_job(db: AsyncSession) -> ImportJob | None:
+    """
+    Take the oldest claimable job of a user below the concurrency cap.
+
+    Claimable means queued, or running without a heartbeat for
+    `import_job_stale_seconds` because the process running it died. Workers
+    skip jobs another worker has locked. Claims for the same user are
+    serialized with an advisory lock, so the running count checked here can't
+    change until this claim commits. A job claimed more than
+    `import_job_max_attempts` times is marked failed instead.
+    """
+    stale = stale_before()
+    running_job = aliased(ImportJob)
+    running = (
+        select(func.count())
+        .where(
+            running_job.user_id == ImportJob.user_id,
+            running_job.status == "running",
+            running_job.heartbeat_at >= stale,
+        )
+        .correlate(ImportJob)
+        .scalar_subquery()
+    )
+    capped_users: list[int] = []
+
+    while True:
+        result = await db.execute(
+            select(ImportJob)
+            .where(
+                or_(
+                    ImportJob.status == "queued",
+                    and_(ImportJob.status == "running", ImportJob.heartbeat_at < stale),
+                ),
+                ImportJob.user_id.not_in(capped_users),
+                running < settings.import_jobs_per_user,
+            )
+            .order_by(ImportJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalars().first()
+        if job is None:
+            await db.rollback()
+            return None
+
+        await db.execute(select(func.pg_advisory_xact_lock(IMPORT_JOB_LOCK, job.user_id)))
+        running_jobs = await db.scalar(
+            select(func.count())
+            .select_from(ImportJob)
+            .where(
+                ImportJob.user_id == job.user_id,
+                ImportJob.status == "running",
+                ImportJob.heartbeat_at >= stale,
+            )
+        )
+        if running_jobs < settings.import_jobs_per_user:
+            break
+
+        await db.rollback()
+        capped_users.append(job.user_id)
+
+    now = datetime.now(timezone.utc)
+    job.attempts += 1
+    if job.attempts > settings.import_job_max_attempts:
+        job.status = "failed"
+        job.detail = "Import stopped after too many attempts"
+        job.finished_at = now
+        await remove_upload(db, job.id)
+        await db.commit()
+        return None
+
+    job.status = "running"
+    job.started_at = job.started_at or now
+    job.heartbeat_at = now
+    await db.commit()
+    return job
+
+
+async def run_import_job(db: AsyncSession, job: ImportJob) -> None:
+    """
+    Import a claimed job's file, checkpointing after every chunk.
+
+    Progress is updated in the same transaction as each chunk's rows, so
+    `rows_processed` always matches what is committed and a resumed job
+    skips exactly that many entries. A job interrupted by shutdown is queued
+    again; one that stops on an unexpected error is marked failed.
+    """
+    # Chunks may roll back, which expires the instance
+    job_id, file_format = job.id, job.file_format
+    skip_rows, errors = job.rows_processed, list(job.errors)
+
+    async def checkpoint(rows, created, chunk_errors):
+        room = max(settings.bulk_upload_max_errors - len(errors), 0)
+        errors.extend(error.model_dump() for error in chunk_errors[:room])
+        await db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id)
+            .values(
+                rows_processed=ImportJob.rows_processed + rows,
+                rows_created=ImportJob.rows_created + len(created),
+                error_count=ImportJob.error_count + len(chunk_errors),
+                errors=errors,
+                heartbeat_at=datetime.now(timezone.utc),
+            )
+        )
+
+    try:
+        items = await open_import_stream(stored_upload_reader(db, job_id), file_format)
+        async for _ in iter_import_chunks(
+            db, items, skip_rows=skip_rows, checkpoint=checkpoint
+        ):
+            pass
+        job_status, detail = "completed", None
+    except JSONStreamError as exc:
+        job_status, detail = "failed", str(exc)
+    except asyncio.CancelledError:
+        await db.rollback()
+        await requeue_import_job(db, job_id)
+        raise
+    except BaseException as exc:
+        await db.rollback()
+        await finish_import_job(db, job_id, "failed", f"Import interrupted: {exc!r}")
+        raise
+
+    await finish_import_job(db, job_id, job_status, detail)
+
+
+async def requeue_import_job(db: AsyncSession, job_id: int) -> None:
+    await db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id)
+        .values(status="queued", attempts=ImportJob.attempts - 1)
+    )
+    await db.commit()
+
+
+async def finish_import_job(
+    db: AsyncSession, job_id: int, job_status: str, detail: str | None
+) -> None:
+    await db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id)
+        .values(
+            status=job_status,
+            detail=detail,
+            finished_at=datetime.now(timezone.utc),
+        )
+    )
+    await remove_upload(db, job_id)
+    await db.commit()
+
+
+async def process_next_import_job(db: AsyncSession) -> bool:
+    """Claim and run one queued import job; return False if there was none."""
+    job = await claim_import_job(db)
+    if job is None:
+        return False
+    await run_import_job(db, job)
+    return True
@@ -0,0 +1,113 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.author import Author
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Coalesce lookups issued by concurrent requests into one batched query.
+
+    Keys requested within `tick` seconds of the first pending key are resolved
+    together by `batch_fn`, and every waiter receives its own slice of the
+    result. Identical keys requested at the same time share one slot. Batches
+    are grouped by database bind and event loop.
+
+    The batch runs on the session of the request that opened it, which is idle
+    while it waits, so batching never needs a second pooled connection (with
+    every connection held by a waiting request that would deadlock the pool).
+    That session must not hold uncommitted writes other requests could see,
+    so callers use the loader before writing in their transaction (and
+    `get_or_create_author_ids` stops using it once it has inserted authors).
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[AsyncSession, list[K]], Awaitable[dict[K, V]]],
+        tick: float = 0.002,
+        max_batch_size: int = 1000,
+    ):
+        self.batch_fn = batch_fn
+        self.tick = tick
+        self.max_batch_size = max_batch_size
+        self.stats: Counter[str] = Counter()
+        self._pending: dict[
+            tuple[Any, asyncio.AbstractEventLoop],
+            tuple[AsyncSession, dict[K, asyncio.Future]],
+        ] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load_many(self, db: AsyncSession, keys: list[K]) -> dict[K, V]:
+        loop = asyncio.get_running_loop()
+        pending_key = (db.bind, loop)
+
+        if pending_key not in self._pending:
+            self._pending[pending_key] = (db, {})
+            loop.call_later(self.tick, self._dispatch, pending_key)
+        _, batch = self._pending[pending_key]
+
+        futures = {}
+        for key in dict.fromkeys(keys):
+            self.stats["keys"] += 1
+            future = batch.get(key)
+            if future is None:
+                future = batch[key] = loop.create_future()
+            else:
+                self.stats["coalesced"] += 1
+            futures[key] = future
+
+        if len(batch) >= self.max_batch_size:
+            self._dispatch(pending_key)
+
+        results = await asyncio.gather(*(asyncio.shield(f) for f in futures.values()))
+        return {
+            key: value
+            for key, value in zip(futures, results)
+            if value is not _MISSING
+        }
+
+    async def load(self, db: AsyncSession, key: K) -> V | None:
+        return (await self.load_many(db, [key])).get(key)
+
+    def _dispatch(self, pending_key) -> None:
+        if pending_key in self._pending:
+            db, batch = self._pending.pop(pending_key)
+            task = asyncio.ensure_future(self._run(db, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, db: AsyncSession, batch: dict[K, asyncio.Future]) -> None:
+        self.stats["batches"] += 1
+        try:
+            values = await self.batch_fn(db, list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key, _MISSING))
+
+
+async def _load_author_ids(db: AsyncSession, names: list[str]) -> dict[str, int]:
+    result = await db.execute(
+        select(Author.id, Author.name).filter(Author.name.in_(names))
+    )
+    return {name: author_id for author_id, name in result.all()}
+
+
+author_id_loader = BatchLoader(
+    _load_author_ids, tick=settings.lookup_batch_tick_ms / 1000
+)
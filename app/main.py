@@ -4,7 +4,13 @@ from typing import Union
 from fastapi import FastAPI
 from sqlalchemy import text
 
-from app.core.database import async_session
+from app.core.config import settings
+from app.core.database import async_session, engine
+from app.core.invalidation import InvalidationListener, invalidation_bus, listener_dsn
+from app.core.jobs import WorkerPool
+from app.core.traffic import TrafficCaptureMiddleware
+from app.crud.genre import genre_cache
+from app.crud.import_job import process_next_import_job
 from app.routers import auth, book
 
 
@@ -14,11 +20,39 @@ async def lifespan(app: FastAPI):
     async with async_session() as session:
         await session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
         await session.commit()
+        await genre_cache.load(session)
+    import_workers = WorkerPool(
+        process_next_import_job,
+        async_session,
+        workers=settings.import_workers,
+        poll_interval=settings.import_poll_interval_seconds,
+    )
+    import_workers.start()
+    invalidation_listener = None
+    if settings.cache_invalidation_bus:
+        invalidation_listener = InvalidationListener(
+            invalidation_bus,
+            listener_dsn(engine.url),
+            settings.cache_invalidation_channel,
+            keepalive_interval=settings.cache_invalidation_keepalive_seconds,
+        )
+        invalidation_listener.start()
     yield
     print("Shutting down...")
+    if invalidation_listener is not None:
+        await invalidation_listener.stop()
+    await import_workers.stop()
 
 
 app = FastAPI(lifespan=lifespan)
 
+if settings.traffic_capture_path:
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        path=settings.traffic_capture_path,
+        max_bytes=settings.traffic_capture_max_bytes,
+        backup_count=settings.traffic_capture_backup_count,
+    )
+
 app.include_router(auth.router)
 app.include_router(book.router)
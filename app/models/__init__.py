@@ -1,4 +1,5 @@
 from .user import User
 from .author import Author
 from .book import Book
-from .genre import Genre
\ No newline at end of file
+from .genre import Genre
+from .import_job import ImportJob, ImportJobBlock
@@ -12,5 +12,8 @@ class Author(Base):
     name = Column(String(255), nullable=False, unique=True, index=True)
 
     books = relationship(
-        "Book", secondary=book_author_association, back_populates="authors"
+        "Book",
+        secondary=book_author_association,
+        back_populates="authors",
+        passive_deletes=True,
     )
@@ -1,25 +1,94 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
-from sqlalchemy.orm import relationship
+import hashlib
+
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    event,
+    func,
+    inspect,
+    literal_column,
+)
+from sqlalchemy.orm import object_session, relationship
 
 from app.core.database import Base
 
+
+def title_key(title: str) -> str:
+    """
+    Key that near-duplicate titles share: the sha256 of the title casefolded
+    and with runs of whitespace collapsed to one space.
+    """
+    normalized = " ".join(title.casefold().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def _default_title_key(context) -> str:
+    return title_key(context.get_current_parameters()["title"])
+
+
 book_author_association = Table(
     "book_authors",
     Base.metadata,
-    Column("book_id", ForeignKey("books.id"), primary_key=True),
-    Column("author_id", ForeignKey("authors.id"), primary_key=True),
+    Column("book_id", ForeignKey("books.id", ondelete="CASCADE"), primary_key=True),
+    Column("author_id", ForeignKey("authors.id", ondelete="CASCADE"), primary_key=True),
+    # Books of an author in id order, for the author sort of the book list
+    Index("ix_book_authors_author_id_book_id", "author_id", "book_id"),
 )
 
 
 class Book(Base):
     __tablename__ = "books"
+    # (sort key, id) pairs for keyset pagination of the book list
+    __table_args__ = (Index("ix_books_title_id", "title", "id"),)
 
     id = Column(Integer, primary_key=True)
-    title = Column(String(512), nullable=False, index=True)
+    title = Column(String(512), nullable=False)
+    # Unique, so duplicate titles are rejected by an index probe; filled in on
+    # insert and kept in step by _update_title_key, Core updates set it themselves
+    title_key = Column(
+        String(64), nullable=False, unique=True, index=True, default=_default_title_key
+    )
     description = Column(String, nullable=True)
     published_year = Column(Integer, nullable=True)
+    # Raised by every change to the book, its authors included: ETags of the
+    # book routes are built from it. _bump_version covers ORM updates (author
+    # collection changes too), Core updates raise it themselves.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
-    genre_id = Column(Integer, ForeignKey("genres.id"), nullable=False)
+    genre_id = Column(
+        Integer, ForeignKey("genres.id", ondelete="CASCADE"), nullable=False, index=True
+    )
     genre = relationship("Genre", back_populates="books")
 
-    authors = relationship("Author", secondary=book_author_association, back_populates="books")
+    authors = relationship(
+        "Author",
+        secondary=book_author_association,
+        back_populates="books",
+        passive_deletes=True,
+        # The order of BOOK_AUTHORS_COLUMN in app.crud.book, for the ORM reads
+        order_by="Author.name",
+    )
+
+
+# Year sort key of the book list: books without a year sort last, and a plain
+# value keeps `(key, id) > (...)` answerable from the index. Inlined rather
+# than bound, so queries match the indexed expression.
+book_year_sort_key = func.coalesce(Book.published_year, literal_column("2147483647"))
+
+Index("ix_books_year_sort_key_id", book_year_sort_key, Book.id)
+
+
+@event.listens_for(Book, "before_update")
+def _update_title_key(mapper, connection, target):
+    if inspect(target).attrs.title.history.has_changes():
+        target.title_key = title_key(target.title)
+
+
+@event.listens_for(Book, "before_update")
+def _bump_version(mapper, connection, target):
+    if object_session(target).is_modified(target):
+        target.version = Book.version + 1
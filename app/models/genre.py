@@ -10,4 +10,8 @@ class Genre(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(255), unique=True, nullable=False)
 
-    books = relationship("Book", back_populates="genre", cascade="all, delete-orphan")
+    # Books are deleted by the ON DELETE CASCADE on books.genre_id, without
+    # loading them
+    books = relationship(
+        "Book", back_populates="genre", cascade="all, delete-orphan", passive_deletes=True
+    )
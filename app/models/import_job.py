@@ -0,0 +1,56 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.database import Base
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    __table_args__ = (UniqueConstraint("user_id", "job_key"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # queued -> running -> completed | failed
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    filename = Column(String(255), nullable=False)
+    file_format = Column(String(8), nullable=False)
+    # The client's Idempotency-Key, or "sha256:<content_hash>" without one
+    job_key = Column(String(255), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+
+    # Committed in the same transaction as each chunk, so it is also the
+    # checkpoint a resumed job skips to
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_created = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSONB, nullable=False, default=list)
+    detail = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed with every checkpoint; a running job that stops heartbeating
+    # is taken over by another worker
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# The uploaded file of a queued or running job, in order. Kept in the database
+# so a worker on any host can run or resume the job; deleted when it finishes.
+class ImportJobBlock(Base):
+    __tablename__ = "import_job_blocks"
+
+    job_id = Column(
+        Integer, ForeignKey("import_jobs.id", ondelete="CASCADE"), primary_key=True
+    )
+    seq = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
@@ -1,25 +1,88 @@
-import json
 from typing import Literal
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.json_stream import STREAM_FORMATS, JSONStreamError
+from app.core.responses import ORJSONModelResponse, etag_matches, parse_etags
 from app.crud.book import (
+    book_etag,
+    book_versions_from_etags,
+    books_etag,
+    bulk_delete_books,
+    bulk_update_books,
     delete_book,
     get_book,
+    get_book_version,
     get_books,
+    get_books_by_ids,
+    patch_book,
     save_book,
     sort_by_literal,
     update_book,
 )
+from app.crud.book_import import stream_import_books
 from app.crud.book_search import search_books
+from app.crud.import_job import create_import_job, get_import_job
 from app.dependencies.auth import get_current_user
 from app.models.user import User
-from app.schemas.book import BookCreate, BookRead, MultipleBooksResponse
+from app.schemas.book import (
+    BookCreate,
+    BookId,
+    BookRead,
+    BookUpdate,
+    BooksBatchRequest,
+    BooksBatchResponse,
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    BulkUpdateRequest,
+    BulkUpdateResponse,
+    BulkUploadResponse,
+    MultipleBooksResponse,
+    total_mode_literal,
+)
+from app.schemas.import_job import ImportJobRead
 
 router = APIRouter(prefix="/api/v1/books", tags=["books"])
 
+JSON_CONTENT_TYPES = ["application/json", "text/json"]
+NDJSON_CONTENT_TYPES = ["application/x-ndjson", "application/jsonl", "application/json"]
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def if_match_versions(book_id: int, if_match: str | None) -> list[int] | None:
+    """Versions of the book an If-Match header accepts; None to accept any."""
+    if if_match is None:
+        return None
+    etags = parse_etags(if_match)
+    if "*" in etags:
+        return None
+    # If-Match compares strongly, weak ETags never match
+    return book_versions_from_etags(
+        book_id, [etag for etag in etags if not etag.startswith("W/")]
+    )
+
+
+def book_response(
+    book: BookRead, headers: dict | None = None, **kwargs
+) -> ORJSONModelResponse:
+    headers = {"ETag": book_etag(book.id, book.version), **(headers or {})}
+    return ORJSONModelResponse(book, headers=headers, **kwargs)
+
 
 @router.post("/", response_model=BookRead, status_code=status.HTTP_201_CREATED)
 async def create_book(
@@ -28,7 +91,7 @@ async def create_book(
     current_user: User = Depends(get_current_user),
 ):
     book = await save_book(payload=payload, db=db)
-    return book
+    return book_response(book, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/", response_model=MultipleBooksResponse, status_code=status.HTTP_200_OK)
@@ -43,11 +106,18 @@ async def get_books_endpoint(
     published_year_to: int | None = None,
     limit: int = 5,
     page: int = 0,
+    total_mode: total_mode_literal = "exact",
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
 ):
     """
     Get all books with support for pagination,
     sorting (by title, year, author),
-    filtering (by title, author, genre, published_year_from, and published_year_to)
+    filtering (by title, author, genre, published_year_from, and published_year_to).
+    `total_mode` is "exact" (count the matches), "estimated" (planner estimate,
+    no scan) or "cached" (recent exact count of the same filters).
+    Pass a response's `next_cursor` as `cursor` to page by keyset instead of `page`.
+    Send the `ETag` of a page as `If-None-Match` to get 304 while it is unchanged.
     """
     books = await get_books(
         db=db,
@@ -59,8 +129,43 @@ async def get_books_endpoint(
         published_year_to=published_year_to,
         limit=limit,
         offset=page,
+        total_mode=total_mode,
+        cursor=cursor,
     )
-    return books
+    headers = {
+        "ETag": books_etag(books),
+        "Cache-Control": settings.book_list_cache_control,
+    }
+    if if_none_match is not None and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONModelResponse(books, headers=headers)
+
+
+# Declared ahead of /{book_id}, which would take "batch" for an id
+@router.get("/batch", response_model=BooksBatchResponse, status_code=status.HTTP_200_OK)
+async def get_books_batch(
+    ids: list[BookId] = Query(..., min_length=1),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get many books by id in one request: `?ids=3&ids=1&ids=2`. Books come
+    back in the order of `ids`; ids of books that do not exist are listed in
+    `missing_ids`. POST the ids to the same path for longer lists.
+    """
+    books = await get_books_by_ids(db=db, book_ids=ids)
+    return ORJSONModelResponse(books)
+
+
+@router.post("/batch", response_model=BooksBatchResponse, status_code=status.HTTP_200_OK)
+async def post_books_batch(
+    payload: BooksBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Same as `GET /batch`, with the ids in the body: `{"ids": [3, 1, 2]}`."""
+    books = await get_books_by_ids(db=db, book_ids=payload.ids)
+    return ORJSONModelResponse(books)
 
 
 @router.get("/{book_id}", response_model=BookRead, status_code=status.HTTP_200_OK)
@@ -68,9 +173,22 @@ async def get_book_by_id(
     book_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    if_none_match: str | None = Header(None),
 ):
+    """
+    Send the book's `ETag` as `If-None-Match` to get 304 while it is unchanged;
+    that only reads the book's version.
+    """
+    cache_control = {"Cache-Control": settings.book_detail_cache_control}
+    if if_none_match is not None:
+        etag = book_etag(book_id, await get_book_version(db=db, book_id=book_id))
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, **cache_control},
+            )
     book = await get_book(db=db, book_id=book_id)
-    return book
+    return book_response(book, headers=cache_control)
 
 
 @router.put("/{book_id}", response_model=BookRead, status_code=status.HTTP_200_OK)
@@ -79,9 +197,40 @@ async def update_book_endpoint(
     payload: BookCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    if_match: str | None = Header(None),
+):
+    """
+    Replace a book. With `If-Match` set to the book's `ETag` the update is
+    refused with 412 if the book has changed since.
+    """
+    book = await update_book(
+        db=db,
+        book_id=book_id,
+        payload=payload,
+        expected_versions=if_match_versions(book_id, if_match),
+    )
+    return book_response(book)
+
+
+@router.patch("/{book_id}", response_model=BookRead, status_code=status.HTTP_200_OK)
+async def patch_book_endpoint(
+    book_id: int,
+    payload: BookUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    if_match: str | None = Header(None),
 ):
-    book = await update_book(db=db, book_id=book_id, payload=payload)
-    return book
+    """
+    Update only the fields present in the body. `authors`, when sent,
+    replaces the book's author list. `If-Match` works as for PUT.
+    """
+    book = await patch_book(
+        db=db,
+        book_id=book_id,
+        payload=payload,
+        expected_versions=if_match_versions(book_id, if_match),
+    )
+    return book_response(book)
 
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -94,15 +243,37 @@ async def delete_book_endpoint(
     return {"detail": "Book deleted successfully"}
 
 
-@router.post("/bulk-upload", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/bulk-upload",
+    response_model=BulkUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": ImportJobRead}},
+)
 async def bulk_upload_books(
     json_file: UploadFile = File(...),
+    mode: Literal["sync", "async"] = "sync",
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> list[BookRead]:
+):
     """
     Upload a JSON file with a list of books.
 
+    Accepts a JSON array (`.json`) or newline-delimited JSON (`.ndjson`,
+    `.jsonl`). The file is parsed as it is read and books are stored in
+    chunks, each in its own transaction, while the response is streamed
+    back. Entries that cannot be stored (invalid data, a duplicate title, an
+    unknown genre) are skipped and listed in `errors` with their position in
+    the file; `error_count` is the total when the list is truncated.
+
+    With `mode=async` the file is queued instead and the response is 202
+    with an import job; poll `GET /api/v1/books/bulk-upload/{job_id}` for
+    its progress. Jobs are identified by the `Idempotency-Key` header, or by
+    the file's content without one: submitting the same job again returns
+    it instead of importing twice, and a failed job is resumed from its last
+    committed chunk. Sync uploads are not deduplicated, so `Idempotency-Key`
+    is refused without `mode=async`.
+
     Example JSON file:
 
     ```json
@@ -125,43 +296,102 @@ async def bulk_upload_books(
     ```
     """
 
-    allowed_content_types = ["application/json", "text/json"]
+    filename = json_file.filename.lower()
+    if filename.endswith(".json") and json_file.content_type in JSON_CONTENT_TYPES:
+        file_format = "json"
+    elif filename.endswith(NDJSON_EXTENSIONS) and json_file.content_type in NDJSON_CONTENT_TYPES:
+        file_format = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type. File must be a JSON (.json) or NDJSON (.ndjson) file.",
+        )
 
-    if (
-        not json_file.filename.lower().endswith(".json")
-        or json_file.content_type not in allowed_content_types
-    ):
+    if mode == "sync" and idempotency_key is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid file type. File must be a JSON (.json) file.",
+            detail="Idempotency-Key is only supported with mode=async.",
+        )
+
+    if mode == "async":
+        job = await create_import_job(
+            db,
+            user_id=current_user.id,
+            upload=json_file.file,
+            filename=json_file.filename,
+            file_format=file_format,
+            idempotency_key=idempotency_key,
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(job)
         )
 
+    items = STREAM_FORMATS[file_format](json_file.read)
     try:
-        contents = await json_file.read()
-        data = json.loads(contents)
-        if not isinstance(data, list):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="JSON file must contain a list of book objects.",
-            )
+        await items.start()
+    except JSONStreamError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
-        created_books = []
-        for item in data:
-            if not isinstance(item, dict):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Each book entry must be a JSON object.",
-                )
-            book = await save_book(payload=BookCreate(**item), db=db)
-            created_books.append(book)
+    return StreamingResponse(
+        stream_import_books(db, items),
+        status_code=status.HTTP_201_CREATED,
+        media_type="application/json",
+    )
 
-        return created_books
 
-    except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to decode JSON. Please ensure the file contains valid JSON.",
-        )
+@router.post(
+    "/bulk-update", response_model=BulkUpdateResponse, status_code=status.HTTP_200_OK
+)
+async def bulk_update_books_endpoint(
+    payload: BulkUpdateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Apply one patch (description, published_year, genre) to many books.
+
+    Select the books either by `ids` or by `filter`, which takes the same
+    fields as the book list filters. Only the fields present in `patch` are
+    changed. With `dry_run` the matching books are only counted.
+
+    Example body:
+
+    ```json
+    {
+      "filter": {"author": "Herbert", "genre": "fiction"},
+      "patch": {"genre": "science"},
+      "dry_run": true
+    }
+    ```
+    """
+    return await bulk_update_books(db=db, payload=payload)
+
+
+@router.post(
+    "/bulk-delete", response_model=BulkDeleteResponse, status_code=status.HTTP_200_OK
+)
+async def bulk_delete_books_endpoint(
+    payload: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Delete many books, selected either by `ids` or by `filter` (the same
+    fields as the book list filters). Ids that did not exist are listed in
+    `missing_ids`. With `dry_run` the matching books are only counted.
+    """
+    return await bulk_delete_books(db=db, payload=payload)
+
+
+@router.get(
+    "/bulk-upload/{job_id}", response_model=ImportJobRead, status_code=status.HTTP_200_OK
+)
+async def get_bulk_upload_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await get_import_job(db, job_id=job_id, user_id=current_user.id)
 
 
 @router.get(
@@ -173,6 +403,8 @@ async def books_search(
     current_user: User = Depends(get_current_user),
 ):
     results = await search_books(db, query)
-    return MultipleBooksResponse(
-        books=results, total=len(results), page=0, size=len(results)
+    return ORJSONModelResponse(
+        MultipleBooksResponse(
+            books=results, total=len(results), page=0, size=len(results)
+        )
     )
@@ -1,9 +1,14 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Optional
+from pydantic import BaseModel, Field, field_validator
 
 CURRENT_YEAR = datetime.now().year
 
+total_mode_literal = Literal["exact", "estimated", "cached"]
+
+# Ids sent in a list; anything past int4 can match no book and fails the query
+BookId = Annotated[int, Field(ge=1, le=2**31 - 1)]
+
 
 class BookBase(BaseModel):
     title: str = Field(..., examples=["The Great Gatsby"], max_length=512)
@@ -25,13 +30,39 @@ class BookCreate(BookBase):
     pass
 
 
-class BookUpdate(BookBase):
-    pass
+class BookUpdate(BaseModel):
+    """Partial update: only the fields that are sent are changed."""
+
+    title: Optional[str] = Field(None, examples=["The Great Gatsby"], max_length=512)
+    description: Optional[str] = Field(
+        None, examples=["A novel set in the Roaring Twenties."]
+    )
+    published_year: Optional[int] = Field(
+        None,
+        examples=[1925],
+        ge=1800,
+        le=CURRENT_YEAR,
+        description=f"Year must be between 1800 and {CURRENT_YEAR}",
+    )
+    authors: Optional[list[str]] = Field(
+        None, examples=[["F. Scott Fitzgerald"]], min_length=1
+    )
+    genre: Optional[str] = Field(None, examples=["fiction", "thriller"])
+
+    @field_validator("title", "authors", "genre")
+    @classmethod
+    def not_null(cls, value):
+        # Runs only for fields that were sent; these may be left out but not cleared
+        if value is None:
+            raise ValueError("Field cannot be null")
+        return value
 
 
 class BookRead(BookBase):
     id: int
     genre_id: int
+    # Raised on every change; send the ETag built from it as If-Match to update
+    version: int
 
     class Config:
         from_attributes = True
@@ -44,3 +75,75 @@ class MultipleBooksResponse(BaseModel):
     total: int
     page: int
     size: int
+    # How `total` was produced, see get_books
+    total_mode: total_mode_literal = "exact"
+    # Pass as `cursor` to get the page after this one; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class BooksBatchRequest(BaseModel):
+    ids: list[BookId] = Field(..., examples=[[3, 1, 2]], min_length=1)
+
+
+class BooksBatchResponse(BaseModel):
+    # In the order the ids were requested, each book once
+    books: list[BookRead]
+    missing_ids: list[int]
+
+
+class BulkUploadError(BaseModel):
+    index: int
+    title: Optional[str] = None
+    detail: str
+
+
+class BulkUploadResponse(BaseModel):
+    created: list[BookRead]
+    errors: list[BulkUploadError]
+    error_count: int
+
+
+class BookFilter(BaseModel):
+    title: Optional[str] = None
+    author: Optional[str] = None
+    genre: Optional[str] = None
+    published_year_from: Optional[int] = None
+    published_year_to: Optional[int] = None
+
+
+class BookPatch(BaseModel):
+    description: Optional[str] = Field(None, examples=["A novel set in the Roaring Twenties."])
+    published_year: Optional[int] = Field(
+        None,
+        examples=[1925],
+        ge=1800,
+        le=CURRENT_YEAR,
+        description=f"Year must be between 1800 and {CURRENT_YEAR}",
+    )
+    genre: Optional[str] = Field(None, examples=["fiction"])
+
+
+class BulkUpdateRequest(BaseModel):
+    ids: Optional[list[BookId]] = None
+    filter: Optional[BookFilter] = None
+    patch: BookPatch
+    dry_run: bool = False
+
+
+class BulkUpdateResponse(BaseModel):
+    matched: int
+    dry_run: bool
+    ids: list[int]
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[list[BookId]] = None
+    filter: Optional[BookFilter] = None
+    dry_run: bool = False
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+    dry_run: bool
+    ids: list[int]
+    missing_ids: list[int]
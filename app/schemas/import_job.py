@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.book import BulkUploadError
+
+
+class ImportJobRead(BaseModel):
+    id: int
+    status: str
+    filename: str
+    rows_processed: int
+    rows_created: int
+    error_count: int
+    errors: list[BulkUploadError]
+    detail: Optional[str] = None
+    rows_per_second: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
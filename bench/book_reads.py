@@ -0,0 +1,113 @@
+"""
+Latency and statement count of the book list and detail reads.
+
+Seeds a throwaway genre with `--books` books (see `bench.genre_delete`),
+then times `get_books` filtered to that genre at a few page sizes,
+`get_book`, `--batch` books read one `get_book` at a time and the same
+books read by `get_books_by_ids`, through the ORM (`selectinload` of authors and genre), through
+the single Core query (`settings.book_reads_core`) and through the result
+cache (`settings.book_result_cache`, filled by the warm-up reads):
+
+    python -m bench.book_reads --books 20000 --repeat 50
+
+Each line reports the median time of a read and how many statements it
+ran. The seeded genre, books and authors are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, event, select
+
+from app.core.config import settings
+from app.core.database import async_session, engine
+from app.crud.book import get_book, get_books, get_books_by_ids
+from app.models.author import Author
+from app.models.book import Book
+from app.models.genre import Genre
+from bench.genre_delete import seed
+
+# (name, book_reads_core, book_result_cache)
+MODES = [("orm", False, False), ("core", True, False), ("cached", True, True)]
+
+
+async def measure(read, repeat: int) -> tuple[float, int]:
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    timings = []
+    for _ in range(repeat):
+        statements.clear()
+        async with async_session() as db:
+            event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+            try:
+                started = time.perf_counter()
+                await read(db)
+                timings.append(time.perf_counter() - started)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    return statistics.median(timings), len(statements)
+
+
+async def run(args: argparse.Namespace) -> list[tuple[str, str, float, int]]:
+    prefix = f"bench {uuid.uuid4().hex[:8]} "
+    results = []
+    try:
+        genre_id = await seed(prefix, args.books, args.authors)
+        genre = f"{prefix}genre"
+        async with async_session() as db:
+            book_ids = list(
+                await db.scalars(
+                    select(Book.id).where(Book.genre_id == genre_id).limit(args.batch)
+                )
+            )
+            book_id = book_ids[0]
+
+        async def read_one_by_one(db):
+            for book_id in book_ids:
+                await get_book(db, book_id)
+
+        reads = [
+            (f"list limit={limit}", lambda db, limit=limit: get_books(db, genre=genre, limit=limit))
+            for limit in args.limits
+        ]
+        reads.append(("detail", lambda db: get_book(db, book_id)))
+        reads.append((f"detail x{args.batch}", read_one_by_one))
+        reads.append((f"batch {args.batch}", lambda db: get_books_by_ids(db, book_ids)))
+        for name, read in reads:
+            for mode, core, cache in MODES:
+                settings.book_reads_core = core
+                settings.book_result_cache = cache
+                await measure(read, 2)
+                seconds, statements = await measure(read, args.repeat)
+                results.append((name, mode, seconds, statements))
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Genre).where(Genre.name == f"{prefix}genre"))
+            await db.execute(delete(Author).where(Author.name.like(f"{prefix}%")))
+            await db.commit()
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Book read benchmark")
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--authors", type=int, default=1000, help="size of the author pool")
+    parser.add_argument("--limits", type=int, nargs="+", default=[5, 50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=50, help="books per batch read")
+    args = parser.parse_args()
+
+    engine.echo = False
+    for name, mode, seconds, statements in asyncio.run(run(args)):
+        print(f"{name:<18} {mode:<6} {seconds * 1000:8.2f} ms  {statements} statements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput of rendering book list responses.
+
+Seeds a throwaway genre with `--books` books (see `bench.genre_delete`),
+reads one page of each `--limits` size with `get_books`, then renders it the
+way FastAPI renders a returned model (validated against the route's
+`response_model`, `jsonable_encoder`, JSONResponse) and with
+ORJSONModelResponse, and reports pages and books rendered per second:
+
+    python -m bench.book_responses --books 20000 --limits 100 1000 5000
+
+The two bodies are checked to be identical. The seeded genre, books and
+authors are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import delete
+
+from app.core.database import async_session, engine
+from app.core.responses import ORJSONModelResponse
+from app.crud.book import get_books
+from app.main import app
+from app.models.author import Author
+from app.models.genre import Genre
+from bench.genre_delete import seed
+
+
+async def render_validated(field, page) -> bytes:
+    return JSONResponse(await serialize_response(field=field, response_content=page)).body
+
+
+async def render_orjson(field, page) -> bytes:
+    return ORJSONModelResponse(page).body
+
+
+async def pages_per_second(render, field, page, seconds: float) -> float:
+    rendered = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        await render(field, page)
+        rendered += 1
+    return rendered / elapsed
+
+
+async def run(args: argparse.Namespace) -> list[tuple[int, str, float]]:
+    prefix = f"bench {uuid.uuid4().hex[:8]} "
+    route = next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path == "/api/v1/books/" and "GET" in route.methods
+    )
+    results = []
+    try:
+        await seed(prefix, args.books, args.authors)
+        for limit in args.limits:
+            async with async_session() as db:
+                page = await get_books(db, genre=f"{prefix}genre", limit=limit)
+            if await render_validated(route.response_field, page) != await render_orjson(
+                route.response_field, page
+            ):
+                raise RuntimeError(f"bodies differ at limit={limit}")
+            for name, render in (("validated", render_validated), ("orjson", render_orjson)):
+                rate = await pages_per_second(render, route.response_field, page, args.seconds)
+                results.append((limit, name, rate))
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Genre).where(Genre.name == f"{prefix}genre"))
+            await db.execute(delete(Author).where(Author.name.like(f"{prefix}%")))
+            await db.commit()
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Book response rendering benchmark")
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--authors", type=int, default=1000, help="size of the author pool")
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each case")
+    args = parser.parse_args()
+
+    engine.echo = False
+    for limit, name, rate in asyncio.run(run(args)):
+        print(f"limit={limit:<6} {name:<9} {rate:9.1f} pages/s  {rate * limit:11.0f} books/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Bulk import benchmark: the chunked COPY engine against the per-row path.
+
+Generates a synthetic upload and imports it into DATABASE_URL, either through
+`iter_import_chunks` (the /bulk-upload engine) or through one `save_book` call per
+entry, which is what the endpoint used to do:
+
+    python -m bench.bulk_import --books 50000 --engine chunked
+    python -m bench.bulk_import --books 5000 --engine per-row
+
+Books and authors created by the run are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+
+from app.core.database import async_session, engine
+from app.crud.book import save_book
+from app.crud.book_import import iter_import_chunks
+from app.models.author import Author
+from app.models.book import Book, book_author_association
+from app.models.genre import Genre
+from app.schemas.book import BookCreate
+
+BENCH_GENRE = "bench"
+
+
+def generate(books: int, authors: int, prefix: str, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    author_pool = [f"{prefix}author {i}" for i in range(authors)]
+    return [
+        {
+            "title": f"{prefix}book {i}",
+            "description": "Generated by bench.bulk_import",
+            "published_year": rng.randint(1900, 2020),
+            "authors": rng.sample(author_pool, rng.randint(1, 3)),
+            "genre": BENCH_GENRE,
+        }
+        for i in range(books)
+    ]
+
+
+async def import_per_row(items: list[dict]) -> int:
+    created = 0
+    async with async_session() as db:
+        for item in items:
+            try:
+                await save_book(payload=BookCreate(**item), db=db)
+                created += 1
+            except HTTPException:
+                await db.rollback()
+    return created
+
+
+async def import_chunked(items: list[dict], chunk_size: int | None) -> int:
+    async def source():
+        for item in items:
+            yield item
+
+    created = 0
+    async with async_session() as db:
+        async for _, chunk_created, _ in iter_import_chunks(db, source(), chunk_size):
+            created += len(chunk_created)
+    return created
+
+
+async def cleanup(prefix: str) -> None:
+    async with async_session() as db:
+        book_ids = select(Book.id).where(Book.title.like(f"{prefix}%"))
+        await db.execute(
+            delete(book_author_association).where(
+                book_author_association.c.book_id.in_(book_ids)
+            )
+        )
+        await db.execute(delete(Book).where(Book.title.like(f"{prefix}%")))
+        await db.execute(delete(Author).where(Author.name.like(f"{prefix}%")))
+        await db.commit()
+
+
+async def run(args: argparse.Namespace) -> tuple[int, float]:
+    async with async_session() as db:
+        if not await db.scalar(select(Genre.id).where(Genre.name == BENCH_GENRE)):
+            db.add(Genre(name=BENCH_GENRE))
+            await db.commit()
+
+    prefix = f"bench {uuid.uuid4().hex[:8]} "
+    items = generate(args.books, args.authors, prefix, args.seed)
+
+    started = time.perf_counter()
+    try:
+        if args.engine == "chunked":
+            created = await import_chunked(items, args.chunk_size)
+        else:
+            created = await import_per_row(items)
+        elapsed = time.perf_counter() - started
+    finally:
+        await cleanup(prefix)
+        await engine.dispose()
+    return created, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import benchmark")
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=2000, help="size of the author pool")
+    parser.add_argument("--engine", choices=["chunked", "per-row"], default="chunked")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engine.echo = False
+    created, seconds = asyncio.run(run(args))
+    print(f"engine={args.engine} books={args.books} created={created}")
+    print(f"{seconds:.2f} s, {created / seconds:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Time and memory of deleting a genre that has many books.
+
+Seeds a throwaway genre with `--books` books (each linked to one of a small
+pool of authors) directly in SQL, then deletes the genre the way the app
+does, through `session.delete` and a commit, and reports the wall time and
+how much the process's peak resident memory grew:
+
+    python -m bench.genre_delete --books 100000
+
+The seeded authors are deleted afterwards. Linux only (reads /proc).
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from app.core.database import async_session, engine
+from app.models.author import Author
+from app.models.book import Book, book_author_association
+from app.models.genre import Genre
+
+
+def peak_rss_kib() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmHWM not found in /proc/self/status")
+
+
+async def seed(prefix: str, books: int, authors: int) -> int:
+    async with async_session() as db:
+        genre = Genre(name=f"{prefix}genre")
+        db.add(genre)
+        await db.flush()
+        genre_id = genre.id
+
+        series = func.generate_series(1, authors).table_valued("value").render_derived()
+        await db.execute(
+            insert(Author).from_select(
+                ["name"],
+                select(literal(f"{prefix}author ") + series.c.value.cast(Author.name.type)),
+            )
+        )
+        series = func.generate_series(1, books).table_valued("value").render_derived()
+        title = literal(f"{prefix}book ") + series.c.value.cast(Book.title.type)
+        await db.execute(
+            insert(Book).from_select(
+                ["title", "title_key", "published_year", "genre_id"],
+                # Any unique key will do here, the titles are unique already
+                select(title, func.md5(title), 1900 + series.c.value % 120, literal(genre_id)),
+            )
+        )
+        author_ids = select(func.array_agg(Author.id)).where(
+            Author.name.like(f"{prefix}%")
+        ).scalar_subquery()
+        await db.execute(
+            insert(book_author_association).from_select(
+                ["book_id", "author_id"],
+                select(Book.id, author_ids[Book.id % authors + 1]).where(
+                    Book.genre_id == genre_id
+                ),
+            )
+        )
+        await db.commit()
+    return genre_id
+
+
+async def delete_genre(genre_id: int) -> None:
+    async with async_session() as db:
+        genre = await db.get(Genre, genre_id)
+        await db.delete(genre)
+        await db.commit()
+
+
+async def run(args: argparse.Namespace) -> tuple[float, int]:
+    prefix = f"bench {uuid.uuid4().hex[:8]} "
+    try:
+        genre_id = await seed(prefix, args.books, args.authors)
+        rss_before = peak_rss_kib()
+        started = time.perf_counter()
+        await delete_genre(genre_id)
+        elapsed = time.perf_counter() - started
+        rss_growth = peak_rss_kib() - rss_before
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Author).where(Author.name.like(f"{prefix}%")))
+            await db.commit()
+        await engine.dispose()
+    return elapsed, rss_growth
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genre delete benchmark")
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--authors", type=int, default=1000, help="size of the author pool")
+    args = parser.parse_args()
+
+    engine.echo = False
+    seconds, rss_growth = asyncio.run(run(args))
+    print(f"books={args.books}")
+    print(f"{seconds:.2f} s, peak RSS grew by {rss_growth / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+A thundering herd of identical book list reads.
+
+Seeds a throwaway genre with `--books` books (see `bench.genre_delete`),
+then fires `--clients` concurrent `get_books` calls for the same page, each
+on its own session as separate requests would be, with the result cache
+off (the moment right after an entry expired). Runs once without and once
+with `settings.book_read_coalescing` and reports the wall time and how many
+statements reached the database:
+
+    python -m bench.read_herd --clients 200
+
+The seeded genre, books and authors are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, event
+
+from app.core.config import settings
+from app.core.database import async_session, engine
+from app.crud.book import get_books
+from app.models.author import Author
+from app.models.genre import Genre
+from bench.genre_delete import seed
+
+
+async def herd(genre: str, clients: int, limit: int) -> tuple[float, int]:
+    statements = 0
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    async def client():
+        async with async_session() as db:
+            await get_books(db, genre=genre, limit=limit)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    return elapsed, statements
+
+
+async def run(args: argparse.Namespace) -> list[tuple[str, float, int]]:
+    prefix = f"bench {uuid.uuid4().hex[:8]} "
+    settings.book_result_cache = False
+    results = []
+    try:
+        await seed(prefix, args.books, args.authors)
+        for coalescing in (False, True):
+            settings.book_read_coalescing = coalescing
+            await herd(f"{prefix}genre", 1, args.limit)
+            seconds, statements = await herd(f"{prefix}genre", args.clients, args.limit)
+            results.append(("coalesced" if coalescing else "separate", seconds, statements))
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Genre).where(Genre.name == f"{prefix}genre"))
+            await db.execute(delete(Author).where(Author.name.like(f"{prefix}%")))
+            await db.commit()
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent identical reads benchmark")
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--authors", type=int, default=1000, help="size of the author pool")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    engine.echo = False
+    for mode, seconds, statements in asyncio.run(run(args)):
+        print(f"{mode:<10} {seconds * 1000:8.1f} ms  {statements} statements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Replay captured traffic against a running app and report latency per route.
+
+Usage:
+    python -m bench.replay traffic.log traffic.log.1 \
+        --base-url http://localhost:8000 --token <jwt> --speed 4
+
+Capture files are produced by `TrafficCaptureMiddleware` (set
+TRAFFIC_CAPTURE_PATH). Only GET requests are replayed, because request bodies
+are not recorded. `--speed` scales the recorded inter-arrival times (2 replays
+twice as fast, 0 sends everything as fast as the concurrency limit allows).
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+PAGING_PARAMS = {"limit", "page", "cursor"}
+
+
+def load_records(paths: list[str]) -> list[dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    records = [record for record in records if record["method"] == "GET"]
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def filter_combination(record: dict) -> str:
+    keys = sorted(key for key in record["query"] if key not in PAGING_PARAMS)
+    return f"{record['route']} [{','.join(keys) or '-'}]"
+
+
+def summarize(latencies: list[float]) -> dict:
+    latencies = sorted(latencies)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = latencies[0]
+    return {
+        "count": len(latencies),
+        "p50_ms": round(p50, 2),
+        "p90_ms": round(p90, 2),
+        "p99_ms": round(p99, 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+async def replay(
+    records: list[dict],
+    base_url: str,
+    token: str | None,
+    speed: float,
+    concurrency: int,
+) -> tuple[dict, dict, int]:
+    by_route: dict[str, list[float]] = defaultdict(list)
+    by_filters: dict[str, list[float]] = defaultdict(list)
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers) as client:
+
+        async def send(record: dict) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(record["path"], params=record["query"])
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                elapsed = (time.perf_counter() - start) * 1000
+            if response.status_code >= 500:
+                errors += 1
+            by_route[record["route"]].append(elapsed)
+            by_filters[filter_combination(record)].append(elapsed)
+
+        tasks = []
+        first_ts = records[0]["ts"]
+        started = time.perf_counter()
+        for record in records:
+            if speed > 0:
+                delay = (record["ts"] - first_ts) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(record)))
+        await asyncio.gather(*tasks)
+
+    return by_route, by_filters, errors
+
+
+def print_table(title: str, groups: dict[str, list[float]]) -> None:
+    print(f"\n{title}")
+    print(f"{'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  key")
+    for key, latencies in sorted(groups.items(), key=lambda item: -len(item[1])):
+        s = summarize(latencies)
+        print(
+            f"{s['count']:>7} {s['p50_ms']:>9} {s['p90_ms']:>9} "
+            f"{s['p99_ms']:>9} {s['max_ms']:>9}  {key}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("files", nargs="+", help="capture files, rotated ones included")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", help="bearer token used for every request")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args()
+
+    records = load_records(args.files)
+    if not records:
+        parser.error("no GET requests found in the capture files")
+
+    started = time.perf_counter()
+    by_route, by_filters, errors = asyncio.run(
+        replay(records, args.base_url, args.token, args.speed, args.concurrency)
+    )
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        report = {
+            "requests": len(records),
+            "errors": errors,
+            "seconds": round(elapsed, 3),
+            "routes": {key: summarize(v) for key, v in by_route.items()},
+            "filters": {key: summarize(v) for key, v in by_filters.items()},
+        }
+        print(json.dumps(report, indent=2))
+        return
+
+    print(
+        f"replayed {len(records)} requests in {elapsed:.1f}s "
+        f"({len(records) / elapsed:.1f} req/s), {errors} errors"
+    )
+    print_table("latency by route (ms)", by_route)
+    print_table("latency by filter combination (ms)", by_filters)
+
+
+if __name__ == "__main__":
+    main()
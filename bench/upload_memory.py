@@ -0,0 +1,149 @@
+"""
+Peak server memory of POST /api/v1/books/bulk-upload by upload size.
+
+Writes a synthetic catalog to a temporary file, starts the app under uvicorn
+in a subprocess against DATABASE_URL, streams the file to it and reports the
+server's peak resident memory (VmHWM) before and after the upload:
+
+    python -m bench.upload_memory --books 20000 200000
+    python -m bench.upload_memory --books 200000 --format ndjson
+
+Each size runs against a fresh server. Books and authors created by the run
+are deleted afterwards. Linux only (reads /proc).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from app.core.database import engine
+from bench.bulk_import import BENCH_GENRE, cleanup
+from bench.write_load import prepare
+
+
+async def in_fresh_pool(coroutine):
+    # Every asyncio.run() gets its own loop, so pooled connections can't be reused
+    try:
+        return await coroutine
+    finally:
+        await engine.dispose()
+
+
+def peak_rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not available")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def write_catalog(path: str, books: int, prefix: str, file_format: str) -> None:
+    with open(path, "w") as catalog:
+        if file_format == "json":
+            catalog.write("[\n")
+        for i in range(books):
+            item = {
+                "title": f"{prefix}book {i}",
+                "description": "Generated by bench.upload_memory " * 4,
+                "published_year": 1900 + i % 120,
+                "authors": [f"{prefix}author {i % 5000}", f"{prefix}author {i % 7}"],
+                "genre": BENCH_GENRE,
+            }
+            if file_format == "json":
+                catalog.write(("," if i else "") + json.dumps(item) + "\n")
+            else:
+                catalog.write(json.dumps(item) + "\n")
+        if file_format == "json":
+            catalog.write("]\n")
+
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def run(books: int, file_format: str, token: str) -> dict:
+    prefix = f"bench {uuid.uuid4().hex[:8]} "
+    suffix = ".json" if file_format == "json" else ".ndjson"
+    content_type = "application/json" if file_format == "json" else "application/x-ndjson"
+    port = free_port()
+
+    with tempfile.NamedTemporaryFile(suffix=suffix) as catalog:
+        write_catalog(catalog.name, books, prefix, file_format)
+        size_mib = os.path.getsize(catalog.name) / 1024 / 1024
+
+        server = start_server(port)
+        try:
+            idle_mib = peak_rss_mib(server.pid)
+            started = time.perf_counter()
+            with open(catalog.name, "rb") as upload:
+                response = httpx.post(
+                    f"http://127.0.0.1:{port}/api/v1/books/bulk-upload",
+                    files={"json_file": (f"books{suffix}", upload, content_type)},
+                    headers={"Authorization": f"Bearer {token}"},
+                    timeout=None,
+                )
+            seconds = time.perf_counter() - started
+            peak_mib = peak_rss_mib(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+            asyncio.run(in_fresh_pool(cleanup(prefix)))
+
+    body = response.json()
+    return {
+        "books": books,
+        "file_mib": size_mib,
+        "status": response.status_code,
+        "created": len(body["created"]) if isinstance(body, dict) else len(body),
+        "seconds": seconds,
+        "idle_mib": idle_mib,
+        "peak_mib": peak_mib,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk upload peak memory benchmark")
+    parser.add_argument("--books", type=int, nargs="+", default=[20000, 200000])
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json")
+    args = parser.parse_args()
+
+    engine.echo = False
+    token = asyncio.run(in_fresh_pool(prepare()))
+    for books in args.books:
+        result = run(books, args.format, token)
+        print(
+            f"books={result['books']} file={result['file_mib']:.1f} MiB "
+            f"status={result['status']} created={result['created']} "
+            f"{result['seconds']:.1f} s, server RSS idle {result['idle_mib']:.0f} MiB, "
+            f"peak {result['peak_mib']:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
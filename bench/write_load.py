@@ -0,0 +1,153 @@
+"""
+Concurrent write benchmark for POST /api/v1/books/.
+
+Runs the app in-process over the httpx ASGI transport against DATABASE_URL and
+counts every SQL statement the app engine executes, so the effect of lookup
+batching shows up as queries per request and queries per second:
+
+    python -m bench.write_load --clients 200 --requests 2000 --batching on
+    python -m bench.write_load --clients 200 --requests 2000 --batching off
+
+Books pick their authors from a small pool of popular names, which is the case
+where concurrent requests look up the same authors at the same moment. Books
+created by the run are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete, event, select
+
+from app.core.config import settings
+from app.core.database import async_session, engine
+from app.core.security import create_access_token, hash_password
+from app.crud.loader import author_id_loader
+from app.main import app
+from app.models.book import Book, book_author_association
+from app.models.genre import Genre
+from app.models.user import User
+
+BENCH_GENRE = "bench"
+BENCH_EMAIL = "bench@example.com"
+
+
+async def prepare() -> str:
+    async with async_session() as db:
+        if not await db.scalar(select(Genre.id).where(Genre.name == BENCH_GENRE)):
+            db.add(Genre(name=BENCH_GENRE))
+        if not await db.scalar(select(User.id).where(User.email == BENCH_EMAIL)):
+            db.add(User(email=BENCH_EMAIL, password=hash_password("benchmark")))
+        await db.commit()
+    return create_access_token(data={"email": BENCH_EMAIL})
+
+
+async def cleanup(title_prefix: str) -> None:
+    async with async_session() as db:
+        book_ids = select(Book.id).where(Book.title.like(f"{title_prefix}%"))
+        await db.execute(
+            delete(book_author_association).where(
+                book_author_association.c.book_id.in_(book_ids)
+            )
+        )
+        await db.execute(delete(Book).where(Book.title.like(f"{title_prefix}%")))
+        await db.commit()
+
+
+async def run(clients: int, requests: int, authors: int, seed: int) -> dict:
+    token = await prepare()
+    title_prefix = f"bench {uuid.uuid4().hex[:8]} "
+    rng = random.Random(seed)
+    author_pool = [f"Bench Author {i}" for i in range(authors)]
+    payloads = [
+        {
+            "title": f"{title_prefix}{i}",
+            "authors": rng.sample(author_pool, rng.randint(1, 3)),
+            "genre": BENCH_GENRE,
+        }
+        for i in range(requests)
+    ]
+
+    statements = 0
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    semaphore = asyncio.Semaphore(clients)
+    latencies = []
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+
+        async def create(payload: dict) -> None:
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/books/", json=payload)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 201:
+                    failures += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(create(payload) for payload in payloads))
+        finally:
+            elapsed = time.perf_counter() - started
+            event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    await cleanup(title_prefix)
+    await engine.dispose()
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "failures": failures,
+        "seconds": elapsed,
+        "statements": statements,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "loader_batches": author_id_loader.stats["batches"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent POST /api/v1/books/ benchmark")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--authors", type=int, default=50, help="size of the author pool")
+    parser.add_argument("--batching", choices=["on", "off"], default="on")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    settings.lookup_batching = args.batching == "on"
+    engine.echo = False
+
+    result = asyncio.run(run(args.clients, args.requests, args.authors, args.seed))
+    seconds = result["seconds"]
+    print(
+        f"batching={args.batching} clients={args.clients} requests={result['requests']} "
+        f"failures={result['failures']}"
+    )
+    print(
+        f"{result['requests'] / seconds:.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+        f"p99 {result['p99_ms']:.1f} ms"
+    )
+    print(
+        f"{result['statements']} statements: "
+        f"{result['statements'] / result['requests']:.2f} per request, "
+        f"{result['statements'] / seconds:.1f} per second, "
+        f"{result['loader_batches']} loader batches"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
+import json
+
 import pytest
-from sqlalchemy import select
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import create_access_token, hash_password
+from app.crud.import_job import process_next_import_job
 from app.models.author import Author
 from app.models.book import Book
 from app.models.genre import Genre
 from app.models.user import User
+from app.schemas.book import BookRead, MultipleBooksResponse
 
 
 @pytest.fixture
@@ -151,6 +157,183 @@ async def test_delete_book(client, token, book_created, db_session: AsyncSession
     assert book is None
 
 
+async def test_bulk_update_books(client, token, book_created, db_session: AsyncSession):
+    response = client.post(
+        "/api/v1/books/bulk-update",
+        json={"filter": {"title": "Book"}, "patch": {"published_year": 1999}},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"matched": 1, "dry_run": False, "ids": [book_created.id]}
+
+    await db_session.refresh(book_created)
+    assert book_created.published_year == 1999
+
+    response = client.post(
+        "/api/v1/books/bulk-update",
+        json={"ids": [book_created.id, 2**31], "patch": {"published_year": 2000}},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 422
+
+
+async def test_patch_book(client, token, book_created):
+    response = client.patch(
+        f"/api/v1/books/{book_created.id}",
+        json={"published_year": 1999},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["published_year"] == 1999
+    assert response.json()["title"] == book_created.title
+
+    response = client.patch(
+        f"/api/v1/books/{book_created.id}",
+        json={"title": None},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 422
+
+
+async def test_get_book_not_modified(client, token, book_created):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get(f"/api/v1/books/{book_created.id}", headers=headers)
+    assert response.headers["etag"] == f'"{book_created.id}-1"'
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    headers["If-None-Match"] = response.headers["etag"]
+    response = client.get(f"/api/v1/books/{book_created.id}", headers=headers)
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.patch(
+        f"/api/v1/books/{book_created.id}",
+        json={"description": "Changed"},
+        headers={"Authorization": headers["Authorization"]},
+    )
+    response = client.get(f"/api/v1/books/{book_created.id}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{book_created.id}-2"'
+
+
+async def test_write_responses_match_get_for_same_etag(
+    client, token, genre_created, db_session: AsyncSession
+):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post(
+        "/api/v1/books/",
+        json={"title": "Ordered Book", "authors": ["Zed", "Amy"], "genre": "fiction"},
+        headers=headers,
+    )
+    created = response.json()
+    book_id = created["id"]
+    response = client.get(f"/api/v1/books/{book_id}", headers=headers)
+    assert response.json() == created
+    assert created["authors"] == ["Amy", "Zed"]
+
+    response = client.patch(
+        f"/api/v1/books/{book_id}", json={"authors": ["Yan", "Bob", "Zed"]}, headers=headers
+    )
+    patched, etag = response.json(), response.headers["etag"]
+    response = client.get(f"/api/v1/books/{book_id}", headers=headers)
+    assert (response.json(), response.headers["etag"]) == (patched, etag)
+    assert patched["authors"] == ["Bob", "Yan", "Zed"]
+
+    await db_session.execute(delete(Book).where(Book.id == book_id))
+    await db_session.execute(delete(Author).where(Author.name.in_(["Zed", "Amy", "Yan", "Bob"])))
+    await db_session.commit()
+
+
+async def test_get_books_not_modified(client, token, book_created):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/api/v1/books/", headers=headers)
+    etag = response.headers["etag"]
+
+    response = client.get("/api/v1/books/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.patch(
+        f"/api/v1/books/{book_created.id}", json={"published_year": 1999}, headers=headers
+    )
+    response = client.get("/api/v1/books/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def test_update_book_if_match(client, token, book_created):
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {"title": "Book 1", "authors": ["Author 1"], "genre": "fiction"}
+    response = client.put(
+        f"/api/v1/books/{book_created.id}",
+        json=payload,
+        headers={**headers, "If-Match": f'"{book_created.id}-1"'},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{book_created.id}-2"'
+
+    # The ETag sent is now stale
+    response = client.patch(
+        f"/api/v1/books/{book_created.id}",
+        json={"description": "Lost update"},
+        headers={**headers, "If-Match": f'"{book_created.id}-1"'},
+    )
+    assert response.status_code == 412
+    assert response.json()["detail"] == "Book has been changed"
+
+
+async def test_get_books_batch(client, token, book_created):
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get(
+        "/api/v1/books/batch", params={"ids": [999999, book_created.id]}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [book["id"] for book in data["books"]] == [book_created.id]
+    assert data["books"][0]["authors"] == ["Author 1"]
+    assert data["missing_ids"] == [999999]
+
+    response = client.post(
+        "/api/v1/books/batch", json={"ids": [book_created.id]}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["books"] == data["books"]
+
+    response = client.get("/api/v1/books/batch", headers=headers)
+    assert response.status_code == 422
+
+    for bad_id in (0, 2**31):
+        response = client.get(
+            "/api/v1/books/batch", params={"ids": [book_created.id, bad_id]}, headers=headers
+        )
+        assert response.status_code == 422
+        response = client.post(
+            "/api/v1/books/batch", json={"ids": [book_created.id, bad_id]}, headers=headers
+        )
+        assert response.status_code == 422
+
+
+async def test_bulk_delete_books(client, token, book_created, db_session: AsyncSession):
+    response = client.post(
+        "/api/v1/books/bulk-delete",
+        json={"ids": [book_created.id, 999999]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "deleted": 1,
+        "dry_run": False,
+        "ids": [book_created.id],
+        "missing_ids": [999999],
+    }
+
+    response = client.post(
+        "/api/v1/books/bulk-delete",
+        json={"ids": [2**31]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 422
+
+
 async def test_upload_books_bulk(
     client, token, genre_created, db_session: AsyncSession
 ):
@@ -182,7 +365,8 @@ async def test_upload_books_bulk(
     )
     assert response.status_code == 201
     data = response.json()
-    assert len(data) == 2
+    assert len(data["created"]) == 2
+    assert data["errors"] == []
 
     # Verify books are in the database
     for book_data in books_data:
@@ -197,6 +381,81 @@ async def test_upload_books_bulk(
     await db_session.commit()
 
 
+async def test_upload_books_bulk_ndjson(
+    client, token, genre_created, db_session: AsyncSession
+):
+    lines = [
+        '{"title": "Bulk Book 1", "authors": ["Bulk Author 1"], "genre": "fiction"}',
+        '{"title": "Bulk Book 2", "authors": [], "genre": "fiction"}',
+        '{"title": "Bulk Book 3", "authors": ["Bulk Author 1"], "genre": "fiction"',
+    ]
+    response = client.post(
+        "/api/v1/books/bulk-upload",
+        files={"json_file": ("books.ndjson", "\n".join(lines), "application/x-ndjson")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert [book["title"] for book in data["created"]] == ["Bulk Book 1"]
+    assert [error["index"] for error in data["errors"]] == [1, 2]
+    assert "line 3" in data["errors"][1]["detail"]
+    assert data["error_count"] == 2
+
+    book = await db_session.execute(select(Book).where(Book.title == "Bulk Book 1"))
+    await db_session.delete(book.scalars().one())
+    await db_session.commit()
+
+
+async def test_upload_books_bulk_not_a_list(client, token):
+    response = client.post(
+        "/api/v1/books/bulk-upload",
+        files={"json_file": ("books.json", '{"title": "Dune"}', "application/json")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "JSON file must contain a list of book objects."
+
+
+async def test_upload_books_bulk_sync_refuses_idempotency_key(client, token):
+    response = client.post(
+        "/api/v1/books/bulk-upload",
+        files={"json_file": ("books.json", "[]", "application/json")},
+        headers={"Authorization": f"Bearer {token}", "Idempotency-Key": "upload-1"},
+    )
+    assert response.status_code == 400
+    assert "mode=async" in response.json()["detail"]
+
+
+async def test_upload_books_bulk_async(
+    client, token, genre_created, db_session: AsyncSession
+):
+    books_data = [{"title": "Bulk Book 1", "authors": ["Bulk Author 1"], "genre": "fiction"}]
+    response = client.post(
+        "/api/v1/books/bulk-upload",
+        params={"mode": "async"},
+        files={"json_file": ("books.json", json.dumps(books_data), "application/json")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+
+    assert await process_next_import_job(db_session)
+
+    response = client.get(
+        f"/api/v1/books/bulk-upload/{job['id']}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "completed"
+    assert job["rows_processed"] == job["rows_created"] == 1
+
+    book = await db_session.execute(select(Book).where(Book.title == "Bulk Book 1"))
+    await db_session.delete(book.scalars().one())
+    await db_session.commit()
+
+
 async def test_search_books(client, token, book_created):
     response = client.get(
         "/api/v1/books/search/",
@@ -207,3 +466,35 @@ async def test_search_books(client, token, book_created):
     data = response.json()
     assert len(data["books"]) == 1
     assert data["books"][0]["title"] == "Book 1"
+
+
+@pytest.mark.parametrize(
+    "path, params, model",
+    [
+        ("/api/v1/books/", {}, MultipleBooksResponse),
+        ("/api/v1/books/", {"sort_by": "author", "limit": 1}, MultipleBooksResponse),
+        ("/api/v1/books/{book_id}", {}, BookRead),
+        ("/api/v1/books/search/", {"query": "Book"}, MultipleBooksResponse),
+    ],
+)
+async def test_book_responses_match_json_response(client, token, book_created, path, params, model):
+    response = client.get(
+        path.format(book_id=book_created.id),
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    # What the route rendered before: validated against response_model, encoded by JSONResponse
+    expected = JSONResponse(jsonable_encoder(model.model_validate(response.json()))).body
+    assert response.content == expected
+
+
+async def test_book_routes_keep_response_schema(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    schema = paths["/api/v1/books/{book_id}"]["get"]["responses"]["200"]["content"]
+    assert schema["application/json"]["schema"] == {"$ref": "#/components/schemas/BookRead"}
+    schema = paths["/api/v1/books/"]["get"]["responses"]["200"]["content"]
+    assert schema["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/MultipleBooksResponse"
+    }
@@ -0,0 +1,38 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.traffic import TrafficCaptureMiddleware, sanitize_query
+
+
+def test_sanitize_query_strips_credentials():
+    params = sanitize_query(b"title=dune&genre=science&access_token=secret&page=2")
+
+    assert params == {"title": ["dune"], "genre": ["science"], "page": ["2"]}
+
+
+def test_traffic_capture_records_request_shape(tmp_path):
+    capture_file = tmp_path / "traffic.log"
+    app = FastAPI()
+    app.add_middleware(TrafficCaptureMiddleware, path=str(capture_file))
+
+    @app.get("/api/v1/books/{book_id}")
+    async def read_book(book_id: int):
+        return {"id": book_id}
+
+    with TestClient(app) as client:
+        response = client.get(
+            "/api/v1/books/7",
+            params={"title": "dune", "token": "secret"},
+            headers={"Authorization": "Bearer secret"},
+        )
+    assert response.status_code == 200
+
+    records = [json.loads(line) for line in capture_file.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["route"] == "/api/v1/books/{book_id}"
+    assert records[0]["path"] == "/api/v1/books/7"
+    assert records[0]["query"] == {"title": ["dune"]}
+    assert records[0]["status"] == 200
+    assert "secret" not in capture_file.read_text()
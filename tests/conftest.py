@@ -1,47 +1,98 @@
 import asyncio
+import os
 from contextlib import ExitStack
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import create_engine, event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import NullPool
 from sqlalchemy_utils import create_database, database_exists, drop_database
 
 from app.core.config import settings
 from app.core.database import Base, get_db
+from app.crud.author import author_id_cache
+from app.crud.book import book_total_cache
+from app.crud.book_cache import clear_book_caches
+from app.crud.genre import genre_cache
 from app.main import app as actual_app
 
+# "savepoint" runs every test that does not use the HTTP client inside an outer
+# transaction that is rolled back at the end, so the commits made by the app only
+# release savepoints. "commit" keeps the old behaviour of committing for real.
+TEST_DB_ISOLATION = os.getenv("TEST_DB_ISOLATION", "savepoint")
 
-@pytest.fixture(scope="session")
-def engine():
-    engine = create_async_engine(settings.test_database_url, poolclass=NullPool)
-    yield engine
-    engine.sync_engine.dispose()
+# The app's import workers would poll the application database, not the test
+# one; tests run queued jobs explicitly instead.
+settings.import_workers = 0
+# Likewise for the invalidation listener; the bus is tested on its own
+settings.cache_invalidation_bus = False
 
 
-def recreate_test_database():
+def sync_url(url):
     # We need to change url to sync driver for sqlalchemy_utils to work
-    sync_db_url = settings.test_database_url.replace("postgresql+asyncpg", "postgresql")
+    return make_url(url).set(drivername="postgresql")
+
+
+def template_database_url():
+    url = make_url(settings.test_database_url)
+    return url.set(database=f"{url.database}_template")
+
+
+def worker_database_url():
+    # Every pytest-xdist worker (or the single process without xdist) gets its own
+    # database cloned from the template, so workers never see each other's rows.
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    url = make_url(settings.test_database_url)
+    return url.set(database=f"{url.database}_{worker}")
+
+
+def recreate_template_database():
+    url = sync_url(template_database_url())
+
+    if database_exists(url):
+        drop_database(url)
+    create_database(url)
+
+    engine = create_engine(url, poolclass=NullPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+        Base.metadata.create_all(conn)
+    engine.dispose()
+
+
+def pytest_sessionstart(session):
+    # Only the controller (or the single process without xdist) builds the template
+    if not hasattr(session.config, "workerinput"):
+        recreate_template_database()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not hasattr(session.config, "workerinput"):
+        drop_database(sync_url(template_database_url()))
 
-    if database_exists(sync_db_url):
-        drop_database(sync_db_url)
-    create_database(sync_db_url)
+
+@pytest.fixture(scope="session")
+def engine():
+    engine = create_async_engine(
+        worker_database_url().render_as_string(hide_password=False),
+        poolclass=NullPool,
+    )
+    yield engine
+    engine.sync_engine.dispose()
 
 
 @pytest.fixture(scope="session", autouse=True)
-async def init_test_db(engine):
-    recreate_test_database()
+def init_test_db(engine):
+    url = sync_url(worker_database_url())
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if database_exists(url):
+        drop_database(url)
+    create_database(url, template=template_database_url().database)
 
     yield
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-
-    drop_database(settings.test_database_url)
+    drop_database(url)
 
 
 @pytest.fixture(scope="session")
@@ -55,15 +106,61 @@ async def sessionmanager(engine):
 
 
 @pytest.fixture(scope="function")
-async def db_session(sessionmanager):
-    async with sessionmanager() as session:
-        await session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
-        await session.commit()
+async def db_session(request, engine, sessionmanager):
+    # The HTTP client runs the app on its own event loop and connections, so tests
+    # that use it need committed data and fall back to the commit mode.
+    if TEST_DB_ISOLATION == "commit" or "client" in request.fixturenames:
+        async with sessionmanager() as session:
+            try:
+                await session.begin()
+                yield session
+            finally:
+                await session.rollback()
+        return
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            autoflush=False,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
         try:
-            await session.begin()
             yield session
         finally:
-            await session.rollback()
+            await session.close()
+            await transaction.rollback()
+
+
+@pytest.fixture
+def count_statements(engine):
+    # `await count_statements(run)` returns run()'s result and the statements it
+    # sent, leaving out the savepoints that stand in for commits in tests
+    async def count(run):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT")):
+                statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            result = await run()
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+        return result, statements
+
+    return count
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # Rows from earlier tests may have been rolled back behind the caches' backs
+    genre_cache.invalidate()
+    author_id_cache.clear()
+    book_total_cache.clear()
+    clear_book_caches()
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import FaultInjector
+
+
+@pytest.fixture
+def fault_injector(engine):
+    injectors = []
+
+    def install(spec):
+        injector = FaultInjector.from_spec(spec)
+        injector.install(engine)
+        injectors.append(injector)
+        return injector
+
+    yield install
+    for injector in injectors:
+        injector.remove(engine)
+
+
+async def test_fault_injector_adds_latency(engine, fault_injector):
+    injector = fault_injector({"seed": 1, "select": {"latency_ms": 50}})
+
+    async with engine.connect() as conn:
+        start = time.perf_counter()
+        await conn.execute(text("SELECT 1"))
+        elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.05
+    assert injector.stats["select_delayed"] == 1
+
+
+async def test_fault_injector_fails_statements(engine, fault_injector):
+    injector = fault_injector({"seed": 1, "select": {"failure_rate": 1.0}})
+
+    async with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            await conn.execute(text("SELECT 1"))
+
+    assert injector.stats["select_failed"] == 1
+
+
+async def test_fault_injector_fails_commits(engine, fault_injector):
+    fault_injector({"seed": 1, "commit": {"failure_rate": 1.0}})
+
+    with pytest.raises(OperationalError):
+        async with engine.begin() as conn:
+            await conn.execute(text("SELECT 1"))
+
+
+def test_fault_injector_is_deterministic():
+    spec = {"seed": 42, "select": {"latency_ms": 10, "distribution": "exponential"}}
+    first, second = FaultInjector.from_spec(spec), FaultInjector.from_spec(spec)
+    profile = first.profiles["select"]
+
+    assert [first._delay(profile) for _ in range(5)] == [
+        second._delay(profile) for _ in range(5)
+    ]
+
+
+def test_fault_injector_rejects_unknown_statement_type():
+    with pytest.raises(ValueError):
+        FaultInjector.from_spec({"truncate": {"latency_ms": 1}})
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy import text, update
+
+from app.core.config import settings
+from app.core.invalidation import (
+    MAX_PAYLOAD_BYTES,
+    InvalidationBus,
+    InvalidationListener,
+    invalidation_bus,
+    listener_dsn,
+)
+from app.models.book import Book
+
+
+async def wait_until(predicate, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+def recording_bus() -> tuple[InvalidationBus, list]:
+    bus = InvalidationBus()
+    received = []
+    bus.register("books", lambda keys: received.append(("books", keys)))
+    bus.register("authors", lambda keys: received.append(("authors", keys)))
+    return bus, received
+
+
+@pytest.fixture
+async def listener(engine, monkeypatch):
+    channel = f"test_invalidation_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(settings, "cache_invalidation_bus", True)
+    monkeypatch.setattr(settings, "cache_invalidation_channel", channel)
+    bus, received = recording_bus()
+    listener = InvalidationListener(
+        bus, listener_dsn(engine.url), channel, reconnect_delay=0.05
+    )
+    listener.start()
+    await asyncio.wait_for(listener.connected.wait(), 5)
+    received.clear()
+    yield listener, received
+    await listener.stop()
+
+
+async def test_commit_notifies_other_processes(sessionmanager, listener):
+    listener, received = listener
+    async with sessionmanager() as db:
+        await db.execute(update(Book).where(Book.id == -1).values(description="x"))
+        invalidation_bus.publish(db, "authors", ["Author B", "Author A"])
+        await db.commit()
+
+    await wait_until(lambda: len(received) == 2)
+    assert sorted(received) == [("authors", ["Author A", "Author B"]), ("books", None)]
+
+
+async def test_rollback_notifies_nothing(sessionmanager, listener):
+    listener, received = listener
+    async with sessionmanager() as db:
+        await db.execute(update(Book).where(Book.id == -1).values(description="x"))
+        await db.rollback()
+        invalidation_bus.publish(db, "authors", ["Committed"])
+        await db.commit()
+
+    await wait_until(lambda: received)
+    await asyncio.sleep(0.1)
+    assert received == [("authors", ["Committed"])]
+
+
+async def test_listener_reconnects_and_flushes(engine, sessionmanager, listener):
+    listener, received = listener
+    async with engine.connect() as conn:
+        await conn.execute(
+            text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE query LIKE 'LISTEN%' AND query LIKE :channel"
+            ),
+            {"channel": f"%{listener.channel}%"},
+        )
+
+    # Whatever was sent while it was away is lost: everything is flushed
+    await wait_until(lambda: ("books", None) in received)
+    await asyncio.wait_for(listener.connected.wait(), 5)
+    assert listener.bus.stats["reconnects"] == 1
+    assert ("authors", None) in received
+
+    received.clear()
+    async with sessionmanager() as db:
+        invalidation_bus.publish(db, "authors", ["After reconnect"])
+        await db.commit()
+    await wait_until(lambda: received)
+    assert received == [("authors", ["After reconnect"])]
+
+
+def message(origin: str, invalidations: dict) -> str:
+    return json.dumps({"o": origin, "i": invalidations})
+
+
+def test_messages_apply_without_flushing():
+    # Overlapping transactions of a process commit, and notify, in any order
+    bus, received = recording_bus()
+    bus.apply(message("other", {"authors": ["B"]}))
+    bus.apply(message("other", {"authors": ["A"], "books": None}))
+    assert received == [("authors", ["B"]), ("authors", ["A"]), ("books", None)]
+    assert bus.stats["flushes"] == 0
+
+
+def test_own_and_unreadable_messages():
+    bus, received = recording_bus()
+    bus.apply(message(bus.origin, {"authors": ["A"]}))
+    assert received == []
+
+    bus.apply("not json")
+    assert received == [("books", None), ("authors", None)]
+
+
+def test_oversized_message_drops_whole_kind():
+    bus = InvalidationBus()
+    names = [f"Author {i:05}" for i in range(1000)]
+    payload = bus.message({"authors": names, "books": None})
+    assert len(payload.encode()) <= MAX_PAYLOAD_BYTES
+    assert json.loads(payload)["i"] == {"authors": None, "books": None}
@@ -0,0 +1,87 @@
+import io
+import json
+
+import pytest
+
+from app.core.json_stream import JSONArrayStream, JSONStreamError, NDJSONStream
+
+
+def reader(data: bytes):
+    stream = io.BytesIO(data)
+
+    async def read(size: int) -> bytes:
+        return stream.read(size)
+
+    return read
+
+
+async def collect(stream) -> list:
+    await stream.start()
+    return [item async for item in stream]
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 64 * 1024])
+async def test_json_array_stream(read_size):
+    items = [
+        {"title": "Dune", "authors": ["Frank Herbert"], "published_year": 1965},
+        {"title": "Ünïcödé ✓", "authors": []},
+        12345,
+        -1.5e3,
+        None,
+    ]
+    # Leading byte order mark, whitespace everywhere and multi-byte characters
+    # that get split between reads
+    body = " ,\n".join(json.dumps(item, ensure_ascii=False) for item in items)
+    data = "\ufeff [ " + body + " ]\n"
+    stream = JSONArrayStream(reader(data.encode()), read_size=read_size)
+
+    assert await collect(stream) == items
+
+
+async def test_json_array_stream_empty_list():
+    assert await collect(JSONArrayStream(reader(b"[]"))) == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b'{"title": "Dune"}', b'[{"title": "Dune"}', b"[1 2]", b"[1,]", b"[1] 2"],
+)
+async def test_json_array_stream_errors(data):
+    with pytest.raises(JSONStreamError):
+        await collect(JSONArrayStream(reader(data), read_size=2))
+
+
+async def test_json_array_stream_item_too_large():
+    data = b'[{"title": "' + b"x" * 100 + b'"}]'
+    with pytest.raises(JSONStreamError, match="too large"):
+        await collect(JSONArrayStream(reader(data), read_size=8, max_item_size=50))
+
+
+async def test_json_array_stream_reports_error_before_buffer_end():
+    # The bad entry is followed by plenty of valid data: the error is reported
+    # as soon as it is read instead of buffering up to the size limit
+    data = b'[{"title" "Dune"}, ' + b'{"title": "Emma"}, ' * 20 + b"1]"
+    with pytest.raises(JSONStreamError, match="Expecting ':' delimiter"):
+        await collect(JSONArrayStream(reader(data), read_size=32, max_item_size=64))
+
+
+@pytest.mark.parametrize("read_size", [1, 5, 64 * 1024])
+async def test_ndjson_stream(read_size):
+    data = b'{"title": "Dune"}\n\n{"title": "Emma"}\r\n{"title": "Ulysses"}'
+    stream = NDJSONStream(reader(data), read_size=read_size)
+
+    assert await collect(stream) == [
+        {"title": "Dune"},
+        {"title": "Emma"},
+        {"title": "Ulysses"},
+    ]
+
+
+async def test_ndjson_stream_reports_line():
+    stream = NDJSONStream(reader(b'{"title": "Dune"}\n{"title": \n'))
+    await stream.start()
+    items = []
+    with pytest.raises(JSONStreamError, match="line 2"):
+        async for item in stream:
+            items.append(item)
+    assert items == [{"title": "Dune"}]
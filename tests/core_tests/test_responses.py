@@ -0,0 +1,70 @@
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import ORJSONModelResponse, etag_matches
+from app.schemas.book import BookRead, MultipleBooksResponse
+
+
+def book(**fields) -> BookRead:
+    return BookRead(
+        **{
+            "id": 1,
+            "title": "Dune",
+            "description": None,
+            "published_year": None,
+            "authors": ["Frank Herbert"],
+            "genre": "science",
+            "genre_id": 2,
+            "version": 1,
+            **fields,
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        book(),
+        book(title="Ünïcödé ✓ 📚", authors=["Łukasz", "東野圭吾"]),
+        book(title='Quotes " and \\ backslash', description="tab\tnew\nline\r\x01\x1f"),
+        book(title="Separators     </script>", published_year=1925),
+        MultipleBooksResponse(books=[], total=0, page=0, size=5),
+        MultipleBooksResponse(
+            books=[book(), book(id=2, title="Ωmega")],
+            total=2**40,
+            page=3,
+            size=2,
+            total_mode="estimated",
+            next_cursor="eyJzb3J0X2J5IjpudWxsfQ",
+        ),
+    ],
+)
+def test_orjson_response_matches_json_response(model):
+    expected = JSONResponse(jsonable_encoder(model)).body
+    assert ORJSONModelResponse(model).body == expected
+
+
+def test_orjson_response_skips_validation():
+    constructed = BookRead.model_construct(
+        id=1, title="Dune", description=None, published_year=None,
+        authors=["Frank Herbert"], genre="science", genre_id=2, version=1,
+    )
+    response = ORJSONModelResponse(constructed)
+    assert response.body == JSONResponse(jsonable_encoder(book())).body
+    assert response.media_type == "application/json"
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        ('"1-2"', True),
+        ('"1-1", "1-2"', True),
+        ('W/"1-2"', True),
+        ("*", True),
+        ('"1-1"', False),
+        ('"1-20"', False),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, '"1-2"') is matches
@@ -0,0 +1,20 @@
+from sqlalchemy import select
+
+from app.core.session_info import discard_on_rollback
+
+_WRITES = discard_on_rollback("test_writes")
+_LOOKUPS = discard_on_rollback("test_lookups", savepoints=True)
+
+
+async def test_discard_on_rollback(db_session):
+    await db_session.execute(select(1))
+    db_session.info[_WRITES] = True
+    db_session.info[_LOOKUPS] = {}
+
+    savepoint = await db_session.begin_nested()
+    await savepoint.rollback()
+    assert db_session.info[_WRITES] is True
+    assert _LOOKUPS not in db_session.info
+
+    await db_session.rollback()
+    assert _WRITES not in db_session.info
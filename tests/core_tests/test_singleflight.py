@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_load():
+    flights = SingleFlight()
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    results = await asyncio.gather(*(flights.do("key", load) for _ in range(10)))
+    other = await flights.do("other", load)
+
+    assert loads == 2
+    assert all(result is results[0] for result in results)
+    assert other == ["result"]
+    assert (flights.stats["executed"], flights.stats["coalesced"]) == (2, 9)
+    assert flights.coalescing_rate() == 9 / 11
+    assert len(flights) == 0
+
+
+async def test_waiters_get_the_exception():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    results = await asyncio.gather(
+        *(flights.do("key", load) for _ in range(3)), return_exceptions=True
+    )
+    assert [type(result) for result in results] == [ValueError] * 3
+
+
+async def test_cancelled_waiter_leaves_others_alone():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return 1
+
+    leader = asyncio.create_task(flights.do("key", load))
+    waiters = [asyncio.create_task(flights.do("key", load)) for _ in range(2)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    release.set()
+
+    assert await leader == 1
+    assert await waiters[1] == 1
+    with pytest.raises(asyncio.CancelledError):
+        await waiters[0]
+
+
+async def test_cancelled_leader_hands_over_to_a_waiter():
+    flights = SingleFlight()
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return loads
+
+    leader = asyncio.create_task(flights.do("key", load))
+    waiters = [asyncio.create_task(flights.do("key", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.gather(*waiters) == [2, 2, 2]
+    assert leader.cancelled()
+    assert flights.stats["retried"] == 3
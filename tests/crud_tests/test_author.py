@@ -3,7 +3,11 @@ from sqlalchemy import select
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.author import get_or_create_authors
+from app.crud.author import (
+    author_id_cache,
+    get_or_create_author_ids,
+)
+from app.crud.loader import author_id_loader
 from app.models.author import Author
 
 
@@ -19,54 +23,98 @@ async def author_created(db_session: AsyncSession):
 
 
 async def test_create_authors(db_session):
-    author = await get_or_create_authors(db_session, ["Author 1"])
-    assert author[0] is not None
-    assert str(author[0].name) == "Author 1"
+    author_ids = await get_or_create_author_ids(db_session, ["Author 1"])
+    await db_session.commit()
+    author = await db_session.get(Author, author_ids["Author 1"])
+    assert author is not None
+    assert str(author.name) == "Author 1"
 
-    await db_session.delete(author[0])
+    await db_session.delete(author)
     await db_session.commit()
 
 
 async def test_create_multiple_authors(db_session):
-    authors = await get_or_create_authors(db_session, ["Author 1", "Author 2"])
-    assert len(authors) == 2
+    author_ids = await get_or_create_author_ids(db_session, ["Author 1", "Author 2"])
+    await db_session.commit()
+    result = await db_session.execute(
+        select(Author).filter(Author.id.in_(author_ids.values()))
+    )
+    authors = list(result.scalars().all())
     assert {str(author.name) for author in authors} == {"Author 1", "Author 2"}
 
-    await db_session.delete(authors[0])
-    await db_session.delete(authors[1])
+    for author in authors:
+        await db_session.delete(author)
     await db_session.commit()
 
 
 async def test_get_author(db_session, author_created):
-    authors = await get_or_create_authors(db_session, ["Author 1"])
-    assert len(authors) == 1
-    assert str(authors[0].name) == str(author_created.name)
+    author_ids = await get_or_create_author_ids(db_session, ["Author 1"])
+    assert author_ids == {"Author 1": author_created.id}
 
     existing_authors = await db_session.execute(
         select(Author).filter(Author.name == "Author 1")
     )
-    existing_authors = list(existing_authors.scalars().all())
-    assert len(existing_authors) == 1
-    assert str(existing_authors[0].name) == "Author 1"
+    assert len(existing_authors.scalars().all()) == 1
 
-    await db_session.delete(existing_authors[0])
-    await db_session.commit()
 
+async def test_get_or_create_author_ids(db_session, author_created):
+    author_ids = await get_or_create_author_ids(
+        db_session, ["Author 2", "Author 1", "Author 2"]
+    )
+    assert list(author_ids) == ["Author 2", "Author 1"]
+    assert author_ids["Author 1"] == author_created.id
 
-async def test_get_or_create_authors(db_session, author_created):
-    authors = await get_or_create_authors(db_session, ["Author 1", "Author 2"])
-    assert len(authors) == 2
-    assert str(authors[0].name) == "Author 1"
-    assert str(authors[1].name) == "Author 2"
+    # Nothing is committed, so rolling back removes the new author
+    await db_session.rollback()
+    result = await db_session.execute(select(Author).filter(Author.name == "Author 2"))
+    assert result.scalars().first() is None
 
-    existing_authors = await db_session.execute(
-        select(Author).filter(Author.name.in_(["Author 1", "Author 2"]))
+
+async def test_author_ids_cached_after_commit(
+    db_session, count_statements, author_created
+):
+    await get_or_create_author_ids(db_session, ["Author 1"])
+    await db_session.commit()
+    assert author_id_cache.get("Author 1") == author_created.id
+
+    author_ids, statements = await count_statements(
+        lambda: get_or_create_author_ids(db_session, ["Author 1"])
     )
-    existing_authors = list(existing_authors.scalars().all())
-    assert len(existing_authors) == 2
-    assert str(existing_authors[0].name) == "Author 1"
-    assert str(existing_authors[1].name) == "Author 2"
+    assert author_ids == {"Author 1": author_created.id}
+    assert statements == []
+
 
-    await db_session.delete(authors[0])
-    await db_session.delete(authors[1])
+async def test_author_ids_not_cached_after_rollback(db_session):
+    author_ids = await get_or_create_author_ids(db_session, ["Author 2"])
+    assert author_ids["Author 2"] is not None
+    await db_session.rollback()
+
+    assert author_id_cache.get("Author 2") is None
+    assert "Author 2" not in db_session.info.get("author_ids", {})
+
+
+async def test_author_ids_skip_loader_after_insert(db_session, author_created):
+    batches = author_id_loader.stats["batches"]
+    await get_or_create_author_ids(db_session, ["Author 2"])
+    assert author_id_loader.stats["batches"] == batches + 1
+
+    # The session now holds an uncommitted author: it must not lead batches
+    author_ids = await get_or_create_author_ids(db_session, ["Author 1", "Author 3"])
+    assert author_ids["Author 1"] == author_created.id
+    assert author_id_loader.stats["batches"] == batches + 1
+    await db_session.rollback()
+
+    await get_or_create_author_ids(db_session, ["Author 3"])
+    assert author_id_loader.stats["batches"] == batches + 2
+    await db_session.rollback()
+
+
+async def test_author_ids_cache_invalidated_on_delete(db_session):
+    author_ids = await get_or_create_author_ids(db_session, ["Author 2"])
+    await db_session.commit()
+    assert author_id_cache.get("Author 2") == author_ids["Author 2"]
+
+    author = await db_session.get(Author, author_ids["Author 2"])
+    await db_session.delete(author)
     await db_session.commit()
+    assert author_id_cache.get("Author 2") is None
@@ -1,15 +1,41 @@
+import asyncio
 import itertools
 import random
 
 import pytest
-from sqlalchemy import select
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.crud.book import delete_book, get_book, get_books, save_book, update_book
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.crud.book import (
+    bulk_delete_books,
+    bulk_update_books,
+    delete_book,
+    encode_cursor,
+    get_book,
+    get_book_version,
+    get_books,
+    get_books_by_ids,
+    patch_book,
+    save_book,
+    update_book,
+)
+from app.crud.book_cache import book_cache_stats, book_detail_cache
+from app.crud.genre import get_genre_id_by_name
 from app.models.author import Author
-from app.models.book import Book
+from app.models.book import Book, book_author_association, title_key
 from app.models.genre import Genre
-from app.schemas.book import BookCreate
+from app.schemas.book import (
+    BookCreate,
+    BookFilter,
+    BookPatch,
+    BookUpdate,
+    BulkDeleteRequest,
+    BulkUpdateRequest,
+)
 
 
 @pytest.fixture
@@ -145,6 +171,18 @@ async def test_save_book_already_exists(db_session, book_created):
     assert "Book already exists" in str(excinfo.value)
 
 
+async def test_save_book_near_duplicate_title(db_session, book_created):
+    book = BookCreate(
+        title="  book   1 ",
+        genre="genre 1",
+        authors=["Author 1"],
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        await save_book(book, db_session)
+
+    assert excinfo.value.detail == "Book already exists"
+
+
 async def test_save_book(db_session, genre_created):
     book = BookCreate(
         title="New Book",
@@ -176,6 +214,23 @@ async def test_save_book(db_session, genre_created):
     await db_session.commit()
 
 
+async def test_save_book_round_trips_do_not_depend_on_author_count(
+    db_session, count_statements, genre_created
+):
+    await get_genre_id_by_name(db_session, genre_created.name)
+    counts = []
+    for i, author_count in enumerate((1, 10)):
+        payload = BookCreate(
+            title=f"Round Trip Book {i}",
+            genre=genre_created.name,
+            authors=[f"Round Trip Author {i}-{j}" for j in range(author_count)],
+        )
+        _, statements = await count_statements(lambda: save_book(payload, db_session))
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+
+
 async def test_get_book_not_found(db_session):
     with pytest.raises(Exception) as excinfo:
         await get_book(db_session, book_id=9999)
@@ -184,15 +239,126 @@ async def test_get_book_not_found(db_session):
     assert "Book not found" in str(excinfo.value)
 
 
-async def test_get_book(db_session, book_created):
+@pytest.mark.parametrize("core", [True, False])
+async def test_get_book(db_session, book_created, genre_created, author_created, monkeypatch, core):
+    monkeypatch.setattr(settings, "book_reads_core", core)
     fetched_book = await get_book(db_session, book_id=book_created.id)
 
     assert fetched_book.id == book_created.id
     assert fetched_book.title == book_created.title
     assert fetched_book.description == book_created.description
     assert fetched_book.published_year == book_created.published_year
-    assert fetched_book.genre == book_created.genre.name
-    assert set(fetched_book.authors) == {author.name for author in book_created.authors}
+    assert fetched_book.genre == genre_created.name
+    assert fetched_book.authors == [author_created.name]
+
+
+async def test_get_book_cached_until_change(db_session, count_statements, book_created):
+    book_id = book_created.id
+    hits = book_cache_stats()["detail"]["hits"]
+    book, statements = await count_statements(lambda: get_book(db_session, book_id))
+    assert len(statements) == 1
+    book, statements = await count_statements(lambda: get_book(db_session, book_id))
+    assert (book.description, statements) == ("Description 1", [])
+
+    await patch_book(db_session, book_id, BookUpdate(description="Patched"))
+    book, statements = await count_statements(lambda: get_book(db_session, book_id))
+    assert (book.description, len(statements)) == ("Patched", 1)
+    assert book_cache_stats()["detail"]["hits"] == hits + 1
+
+
+async def test_get_books_cached_until_change(db_session, count_statements, books_created):
+    page, statements = await count_statements(lambda: get_books(db_session, limit=50))
+    assert len(statements) == 2
+    cached_page, statements = await count_statements(lambda: get_books(db_session, limit=50))
+    assert (cached_page, statements) == (page, [])
+    # Other parameters are another entry
+    await get_books(db_session, limit=50, sort_by="title")
+    assert book_cache_stats()["list"]["size"] == 2
+
+    book = await save_book(
+        BookCreate(title="Cached Book", authors=["Author 1"], genre="genre 1"), db_session
+    )
+    page = await get_books(db_session, limit=50)
+    assert page.total == len(books_created) + 1
+    assert book.id in [book.id for book in page.books]
+
+    await delete_book(db_session, book.id)
+    page = await get_books(db_session, limit=50)
+    assert page.total == len(books_created)
+
+
+async def test_get_books_coalesces_concurrent_reads(
+    db_session, count_statements, books_created, monkeypatch
+):
+    monkeypatch.setattr(settings, "book_result_cache", False)
+
+    async def read_concurrently():
+        # Only one of them uses the session; the others wait for its result
+        return await asyncio.gather(*(get_books(db_session, limit=10) for _ in range(20)))
+
+    pages, statements = await count_statements(read_concurrently)
+    assert len(statements) == 2
+    assert all(page is pages[0] for page in pages)
+    assert book_cache_stats()["flights"]["coalesced"] >= 19
+
+
+async def test_get_books_by_ids(db_session, count_statements, books_created):
+    ids = [books_created[3].id, 999999, books_created[0].id, books_created[3].id]
+    batch, statements = await count_statements(lambda: get_books_by_ids(db_session, ids))
+
+    assert len(statements) == 1
+    assert [book.id for book in batch.books] == [books_created[3].id, books_created[0].id]
+    assert batch.books[0].title == books_created[3].title
+    assert batch.books[0].authors
+    assert batch.missing_ids == [999999]
+
+    # Shares the detail cache both ways
+    assert await get_book(db_session, books_created[0].id) is batch.books[1]
+    await get_book(db_session, books_created[5].id)
+    ids = [books_created[5].id, books_created[0].id]
+    batch, statements = await count_statements(lambda: get_books_by_ids(db_session, ids))
+    assert statements == []
+    assert [book.id for book in batch.books] == ids
+
+
+async def test_get_books_by_ids_core_matches_orm(db_session, books_created, monkeypatch):
+    monkeypatch.setattr(settings, "book_result_cache", False)
+    ids = [book.id for book in books_created[::-3]]
+    batches = {}
+    for core in (True, False):
+        monkeypatch.setattr(settings, "book_reads_core", core)
+        batches[core] = await get_books_by_ids(db_session, ids)
+    assert [book.id for book in batches[True].books] == ids
+    assert batches[True] == batches[False]
+
+
+async def test_get_books_by_ids_over_limit(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "book_batch_max_ids", 2)
+    with pytest.raises(HTTPException) as excinfo:
+        await get_books_by_ids(db_session, [1, 2, 3])
+    assert excinfo.value.status_code == 400
+
+
+async def test_book_cache_kept_on_rollback(db_session, book_created):
+    book_id = book_created.id
+    await get_book(db_session, book_id)
+    generation = book_detail_cache.generation
+
+    await db_session.execute(
+        update(Book).where(Book.id == book_id).values(description="Rolled back")
+    )
+    await db_session.rollback()
+    assert book_detail_cache.generation == generation
+    assert (await get_book(db_session, book_id)).description == "Description 1"
+
+
+async def test_book_cache_skips_read_overlapping_write(db_session, book_created):
+    # A read loaded before a write committed is stored under the old generation
+    generation = book_detail_cache.generation
+    stale_book = await get_book(db_session, book_created.id)
+    book_detail_cache.bump()
+    book_detail_cache.set(book_created.id, stale_book, generation)
+    assert book_detail_cache.get(book_created.id) is None
 
 
 async def test_update_book_not_found(db_session):
@@ -260,6 +426,142 @@ async def test_update_book(db_session, book_created, new_genre):
     await db_session.commit()
 
 
+async def test_patch_book_scalar_field_is_one_statement(
+    db_session, count_statements, book_created
+):
+    patched_book, statements = await count_statements(
+        lambda: patch_book(db_session, book_created.id, BookUpdate(description="Patched"))
+    )
+
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE books")
+    assert patched_book.description == "Patched"
+    assert patched_book.title == "Book 1"
+    assert patched_book.genre == "genre 1"
+    assert patched_book.authors == ["Author 1"]
+
+
+async def test_patch_book_authors_writes_only_changed_links(
+    db_session, book_created, author_created
+):
+    book_id = book_created.id
+    patched_book = await patch_book(
+        db_session, book_id, BookUpdate(authors=["Author 1", "Patch Author"])
+    )
+    assert patched_book.authors == ["Author 1", "Patch Author"]
+    assert patched_book.description == "Description 1"
+
+    links = await db_session.execute(
+        select(book_author_association.c.author_id, Author.name)
+        .join(Author)
+        .where(book_author_association.c.book_id == book_id)
+    )
+    kept = {name: author_id for author_id, name in links.all()}
+    assert set(kept) == {"Author 1", "Patch Author"}
+    assert kept["Author 1"] == author_created.id
+
+    await patch_book(db_session, book_id, BookUpdate(authors=["Patch Author"]))
+    links = await db_session.execute(
+        select(book_author_association.c.author_id).where(
+            book_author_association.c.book_id == book_id
+        )
+    )
+    assert links.scalars().all() == [kept["Patch Author"]]
+
+    await db_session.execute(delete(Author).where(Author.name == "Patch Author"))
+    await db_session.commit()
+
+
+async def test_title_key_follows_title(db_session, book_created):
+    await patch_book(db_session, book_created.id, BookUpdate(title="Patched Title"))
+    stored_key = await db_session.scalar(
+        select(Book.title_key).where(Book.id == book_created.id)
+    )
+    assert stored_key == title_key("patched  title")
+
+    book = await db_session.get(Book, book_created.id)
+    book.title = "Renamed Title"
+    await db_session.commit()
+    stored_key = await db_session.scalar(
+        select(Book.title_key).where(Book.id == book_created.id)
+    )
+    assert stored_key == title_key("RENAMED TITLE")
+
+
+async def test_book_version_raised_on_change(db_session, book_created):
+    book_id = book_created.id
+    assert book_created.version == 1
+
+    patched_book = await patch_book(db_session, book_id, BookUpdate(authors=["Author 1"]))
+    assert patched_book.version == 2
+
+    await bulk_update_books(
+        db_session, BulkUpdateRequest(ids=[book_id], patch=BookPatch(published_year=1999))
+    )
+    assert await get_book_version(db_session, book_id) == 3
+
+    book = await db_session.get(Book, book_id)
+    book.description = "Changed through the ORM"
+    await db_session.commit()
+    assert await get_book_version(db_session, book_id) == 4
+
+    # Changing only the authors through the ORM raises it too
+    book = await db_session.get(
+        Book, book_id, options=[selectinload(Book.authors)], populate_existing=True
+    )
+    book.authors.append(Author(name="ORM Author"))
+    await db_session.commit()
+    assert await get_book_version(db_session, book_id) == 5
+
+    await db_session.execute(delete(Author).where(Author.name == "ORM Author"))
+    await db_session.commit()
+
+
+async def test_patch_book_if_match(db_session, book_created):
+    book_id = book_created.id
+    with pytest.raises(HTTPException) as excinfo:
+        await patch_book(db_session, book_id, BookUpdate(description="Stale"), [7])
+    assert excinfo.value.status_code == 412
+
+    patched_book = await patch_book(db_session, book_id, BookUpdate(description="Fresh"), [1])
+    assert (patched_book.description, patched_book.version) == ("Fresh", 2)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await patch_book(db_session, 9999, BookUpdate(description="Missing"), [1])
+    assert excinfo.value.status_code == 404
+
+
+async def test_patch_book_duplicate_title(db_session, books_created):
+    first_id, second_title = books_created[0].id, books_created[1].title
+    with pytest.raises(HTTPException) as excinfo:
+        await patch_book(db_session, first_id, BookUpdate(title=f" {second_title.upper()}"))
+    assert (excinfo.value.status_code, excinfo.value.detail) == (400, "Book already exists")
+
+    # The session is usable again
+    book = await patch_book(db_session, first_id, BookUpdate(title="Unique Title"))
+    assert book.title == "Unique Title"
+
+
+async def test_patch_book_empty_changes_nothing(
+    db_session, count_statements, book_created
+):
+    book, statements = await count_statements(
+        lambda: patch_book(db_session, book_created.id, BookUpdate())
+    )
+    assert (book.title, book.version) == ("Book 1", 1)
+    assert not [statement for statement in statements if statement.startswith("UPDATE")]
+
+    with pytest.raises(HTTPException) as excinfo:
+        await patch_book(db_session, book_created.id, BookUpdate(), [7])
+    assert excinfo.value.status_code == 412
+
+
+async def test_patch_book_not_found(db_session):
+    with pytest.raises(HTTPException) as excinfo:
+        await patch_book(db_session, 9999, BookUpdate(genre="Nonexistent Genre"))
+    assert excinfo.value.detail == "Book not found"
+
+
 async def test_delete_book_not_found(db_session):
     with pytest.raises(Exception) as excinfo:
         await delete_book(db_session, book_id=9999)
@@ -268,15 +570,22 @@ async def test_delete_book_not_found(db_session):
     assert "Book not found" in str(excinfo.value)
 
 
-async def test_delete_book(db_session, book_created):
-    await delete_book(db_session, book_id=book_created.id)
+async def test_delete_book(db_session, book_created, author_created):
+    book_id = book_created.id
+    author_ids = [author_created.id]
+    await delete_book(db_session, book_id=book_id)
 
-    result = await db_session.execute(select(Book).where(Book.id == book_created.id))
+    result = await db_session.execute(select(Book).where(Book.id == book_id))
     deleted_book = result.scalars().first()
     assert deleted_book is None
 
-    for author in book_created.authors:
-        result = await db_session.execute(select(Author).where(Author.id == author.id))
+    result = await db_session.execute(
+        select(book_author_association).where(book_author_association.c.book_id == book_id)
+    )
+    assert result.first() is None
+
+    for author_id in author_ids:
+        result = await db_session.execute(select(Author).where(Author.id == author_id))
         author_in_db = result.scalars().first()
         if author_in_db:
             await db_session.delete(author_in_db)
@@ -293,6 +602,123 @@ async def test_get_books(db_session, book_created):
     assert fetched_books.size == 5
 
 
+@pytest.mark.parametrize("sort_by", [None, "title", "year", "author"])
+async def test_get_books_cursor_pages(db_session, books_created, sort_by):
+    await db_session.execute(
+        update(Book)
+        .where(Book.id.in_([book.id for book in books_created[:3]]))
+        .values(published_year=None)
+    )
+    expected = await get_books(db_session, sort_by=sort_by, limit=100)
+
+    pages = []
+    cursor = None
+    while True:
+        page = await get_books(db_session, sort_by=sort_by, limit=4, cursor=cursor)
+        pages.append([book.id for book in page.books])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert [book_id for page in pages for book_id in page] == [
+        book.id for book in expected.books
+    ]
+    assert len(pages) == 7
+    assert expected.next_cursor is None
+
+
+@pytest.mark.parametrize("sort_by", [None, "title", "year", "author"])
+async def test_get_books_core_matches_orm(
+    db_session, authors_created, books_created, monkeypatch, sort_by
+):
+    # A second author, so author lists and the author sort have something to order
+    await db_session.execute(
+        pg_insert(book_author_association)
+        .values(book_id=books_created[0].id, author_id=authors_created[0].id)
+        .on_conflict_do_nothing()
+    )
+    monkeypatch.setattr(settings, "book_result_cache", False)
+    pages = {}
+    for core in (True, False):
+        monkeypatch.setattr(settings, "book_reads_core", core)
+        page = await get_books(db_session, sort_by=sort_by, limit=10, offset=1)
+        for book in page.books:
+            book.authors.sort()
+        pages[core] = page
+
+    assert len(pages[True].books) == 10
+    assert pages[True] == pages[False]
+    await db_session.rollback()
+
+
+async def test_get_books_offset_page_continues_with_cursor(db_session, books_created):
+    first_page = await get_books(db_session, sort_by="title", limit=5, offset=1)
+    second_page = await get_books(
+        db_session, sort_by="title", limit=5, cursor=first_page.next_cursor
+    )
+    offset_page = await get_books(db_session, sort_by="title", limit=5, offset=2)
+
+    assert [book.id for book in second_page.books] == [book.id for book in offset_page.books]
+
+
+async def test_get_books_invalid_cursor(db_session, books_created):
+    page = await get_books(db_session, sort_by="title", limit=5)
+    for cursor in ("not a cursor", page.next_cursor):
+        with pytest.raises(HTTPException) as excinfo:
+            await get_books(db_session, sort_by="year", cursor=cursor)
+        assert excinfo.value.detail == "Invalid cursor"
+
+
+async def test_get_books_tampered_cursor_key(db_session, books_created):
+    tampered = [
+        ("title", ["a"]),
+        ("title", {"a": 1}),
+        ("title", 1),
+        ("author", None),
+        ("year", "1999"),
+        ("year", 2**40),
+        ("year", True),
+    ]
+    for sort_by, key in tampered:
+        with pytest.raises(HTTPException) as excinfo:
+            await get_books(db_session, sort_by=sort_by, cursor=encode_cursor(sort_by, key, 1))
+        assert excinfo.value.detail == "Invalid cursor"
+
+    # Without a sort the key is not used
+    page = await get_books(db_session, cursor=encode_cursor(None, ["a"], 0))
+    assert len(page.books) == 5
+
+
+async def test_get_books_limit_zero(db_session, books_created):
+    page = await get_books(db_session, limit=0)
+    assert (page.books, page.next_cursor, page.total) == ([], None, 25)
+
+
+async def test_get_books_estimated_total(db_session, books_created):
+    await db_session.execute(text("ANALYZE books"))
+
+    fetched_books = await get_books(db_session, total_mode="estimated")
+    assert (fetched_books.total, fetched_books.total_mode) == (25, "estimated")
+
+    for title in ("o'", "%", "%(x)s", "%s"):
+        fetched_books = await get_books(db_session, title=title, total_mode="estimated")
+        assert fetched_books.total_mode == "estimated"
+        assert fetched_books.total >= 0
+
+
+async def test_get_books_cached_total(db_session, books_created):
+    fetched_books = await get_books(db_session, author="Author 1", total_mode="cached")
+    assert (fetched_books.total, fetched_books.total_mode) == (5, "exact")
+
+    await db_session.execute(delete(Book).where(Book.id == books_created[0].id))
+    fetched_books = await get_books(db_session, author="author 1 ", total_mode="cached")
+    assert fetched_books.total_mode == "exact"
+
+    fetched_books = await get_books(db_session, author="AUTHOR 1", total_mode="cached")
+    assert (fetched_books.total, fetched_books.total_mode) == (5, "cached")
+    await db_session.rollback()
+
+
 async def test_get_books_filter_by_title(db_session, books_created):
     title_filter = "Book by Author 0 in genre 0"
     fetched_books = await get_books(db_session, title=title_filter)
@@ -415,3 +841,132 @@ async def test_get_books_sort_by_author(db_session, books_created):
     assert authors == sorted(authors)
     assert fetched_books.page == 0
     assert fetched_books.size == 5
+
+
+async def test_get_books_filter_by_author_and_sort_by_author(db_session, books_created):
+    fetched_books = await get_books(db_session, author="author 1", sort_by="author")
+
+    assert fetched_books.total == 5
+    assert {book.authors[0] for book in fetched_books.books} == {"Author 1"}
+
+
+async def test_bulk_update_books_by_filter(db_session, books_created, new_genre):
+    payload = BulkUpdateRequest(
+        filter=BookFilter(author="author 1", published_year_to=1850),
+        patch=BookPatch(genre=new_genre.name, description="Reclassified"),
+    )
+    expected_ids = {
+        book.id
+        for book in books_created
+        if "by Author 1 in" in book.title and book.published_year <= 1850
+    }
+
+    result = await bulk_update_books(db_session, payload.model_copy(update={"dry_run": True}))
+    assert (result.matched, result.ids) == (len(expected_ids), [])
+
+    result = await bulk_update_books(db_session, payload)
+    assert set(result.ids) == expected_ids
+
+    rows = await db_session.execute(
+        select(Book.genre_id, Book.description, Book.published_year).where(
+            Book.id.in_(expected_ids)
+        )
+    )
+    for genre_id, description, published_year in rows.all():
+        assert (genre_id, description) == (new_genre.id, "Reclassified")
+        assert published_year is not None
+
+    # Move the books back, deleting new_genre would delete them with it
+    for book in books_created:
+        if book.id in expected_ids:
+            await db_session.execute(
+                update(Book).where(Book.id == book.id).values(genre_id=book.genre_id)
+            )
+    await db_session.commit()
+
+
+async def test_bulk_update_books_by_ids(db_session, books_created):
+    book_ids = [book.id for book in books_created[:3]] + [999999]
+    result = await bulk_update_books(
+        db_session,
+        BulkUpdateRequest(ids=book_ids, patch=BookPatch(published_year=None)),
+    )
+
+    assert sorted(result.ids) == sorted(book_ids[:3])
+    years = await db_session.execute(select(Book.published_year).where(Book.id.in_(book_ids)))
+    assert years.scalars().all() == [None, None, None]
+
+
+async def test_bulk_update_books_over_limit(
+    db_session, count_statements, books_created, monkeypatch
+):
+    monkeypatch.setattr(settings, "bulk_update_max_rows", 10)
+
+    async def update_too_many():
+        with pytest.raises(HTTPException) as excinfo:
+            await bulk_update_books(
+                db_session,
+                BulkUpdateRequest(filter=BookFilter(), patch=BookPatch(description="Too many")),
+            )
+        return excinfo
+
+    excinfo, statements = await count_statements(update_too_many)
+    assert excinfo.value.status_code == 400
+    # Refused by counting, before any row was written
+    assert not [statement for statement in statements if statement.startswith("UPDATE")]
+
+    descriptions = await db_session.execute(select(Book.description))
+    assert "Too many" not in descriptions.scalars().all()
+
+
+async def test_bulk_update_books_requires_patch(db_session):
+    with pytest.raises(HTTPException) as excinfo:
+        await bulk_update_books(db_session, BulkUpdateRequest(ids=[1], patch=BookPatch()))
+    assert excinfo.value.detail == "Nothing to update"
+
+
+async def test_bulk_delete_books_by_ids(db_session, books_created, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_delete_chunk_size", 2)
+    book_ids = [book.id for book in books_created[:5]] + [999999]
+
+    result = await bulk_delete_books(
+        db_session, BulkDeleteRequest(ids=book_ids, dry_run=True)
+    )
+    assert (result.deleted, result.ids, result.missing_ids) == (5, [], [999999])
+
+    result = await bulk_delete_books(db_session, BulkDeleteRequest(ids=book_ids))
+    assert sorted(result.ids) == sorted(book_ids[:5])
+    assert result.missing_ids == [999999]
+
+    remaining = await db_session.execute(select(Book.id).where(Book.id.in_(book_ids)))
+    assert remaining.scalars().all() == []
+    links = await db_session.execute(
+        select(book_author_association).where(
+            book_author_association.c.book_id.in_(book_ids)
+        )
+    )
+    assert links.all() == []
+
+
+async def test_bulk_delete_books_by_filter(db_session, books_created, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_delete_chunk_size", 2)
+    expected_ids = {book.id for book in books_created if "by Author 1 in" in book.title}
+
+    result = await bulk_delete_books(
+        db_session, BulkDeleteRequest(filter=BookFilter(author="author 1"))
+    )
+
+    assert set(result.ids) == expected_ids
+    assert result.deleted == len(expected_ids)
+    total = await db_session.scalar(select(func.count()).select_from(Book))
+    assert total == len(books_created) - len(expected_ids)
+
+
+async def test_bulk_delete_books_over_limit(db_session, books_created, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_delete_max_rows", 10)
+    with pytest.raises(HTTPException) as excinfo:
+        await bulk_delete_books(db_session, BulkDeleteRequest(filter=BookFilter()))
+    assert excinfo.value.status_code == 400
+
+    total = await db_session.scalar(select(func.count()).select_from(Book))
+    assert total == len(books_created)
@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.book_cache import book_list_cache
+from app.crud.book_import import iter_import_chunks
+from app.models.author import Author
+from app.models.book import Book, book_author_association
+from app.models.genre import Genre
+from app.schemas.book import BulkUploadResponse
+
+
+async def import_books(db, items, chunk_size=None) -> BulkUploadResponse:
+    async def source():
+        for item in items:
+            yield item
+
+    created, errors = [], []
+    async for _, chunk_created, chunk_errors in iter_import_chunks(db, source(), chunk_size):
+        created.extend(chunk_created)
+        errors.extend(chunk_errors)
+    return BulkUploadResponse(created=created, errors=errors, error_count=len(errors))
+
+
+@pytest.fixture
+async def genre_created(db_session: AsyncSession):
+    genre = Genre(name="genre 1")
+    db_session.add(genre)
+    await db_session.commit()
+    await db_session.refresh(genre)
+    yield genre
+    await db_session.delete(genre)
+    await db_session.commit()
+
+
+@pytest.fixture
+async def cleanup_import(db_session: AsyncSession):
+    yield
+    book_ids = select(Book.id).where(Book.title.like("Import Book%"))
+    await db_session.execute(
+        delete(book_author_association).where(
+            book_author_association.c.book_id.in_(book_ids)
+        )
+    )
+    await db_session.execute(delete(Book).where(Book.title.like("Import Book%")))
+    await db_session.execute(delete(Author).where(Author.name.like("Import Author%")))
+    await db_session.commit()
+
+
+async def test_import_books_in_chunks(db_session, genre_created, cleanup_import):
+    items = [
+        {
+            "title": f"Import Book {i}",
+            "authors": [f"Import Author {i % 3}", "Import Author shared"],
+            "genre": genre_created.name,
+            "published_year": 2000 + i,
+        }
+        for i in range(7)
+    ]
+
+    generation = book_list_cache.generation
+    result = await import_books(db_session, items, chunk_size=3)
+
+    assert result.errors == []
+    assert [book.title for book in result.created] == [item["title"] for item in items]
+    # Written by COPY, outside the session's statements
+    assert book_list_cache.generation > generation
+
+    books = await db_session.execute(
+        select(Book.id, Book.title, Book.genre_id).where(Book.title.like("Import Book%"))
+    )
+    stored = {title: (book_id, genre_id) for book_id, title, genre_id in books.all()}
+    assert len(stored) == 7
+    for book in result.created:
+        assert stored[book.title] == (book.id, genre_created.id)
+
+    links = await db_session.scalar(
+        select(func.count()).select_from(book_author_association).where(
+            book_author_association.c.book_id.in_([book.id for book in result.created])
+        )
+    )
+    assert links == 14
+    authors = await db_session.scalar(
+        select(func.count()).select_from(Author).where(Author.name.like("Import Author%"))
+    )
+    assert authors == 4
+
+
+async def test_import_books_reports_bad_rows(db_session, genre_created, cleanup_import):
+    items = [
+        {"title": "Import Book 1", "authors": ["Import Author 1"], "genre": genre_created.name},
+        "not a book",
+        {"title": "Import Book 2", "authors": [], "genre": genre_created.name},
+        {"title": "Import Book 1", "authors": ["Import Author 1"], "genre": genre_created.name},
+        {"title": "Import Book 3", "authors": ["Import Author 1"], "genre": "missing"},
+        {"title": "Import Book 4", "authors": ["Import Author 4"], "genre": genre_created.name},
+    ]
+
+    result = await import_books(db_session, items, chunk_size=2)
+
+    assert [book.title for book in result.created] == ["Import Book 1", "Import Book 4"]
+    assert [(error.index, error.title) for error in result.errors] == [
+        (1, None),
+        (2, "Import Book 2"),
+        (3, "Import Book 1"),
+        (4, "Import Book 3"),
+    ]
+    assert result.errors[3].detail == "Genre not found"
+
+    # A second upload of the same book is rejected by the database check
+    result = await import_books(db_session, items[:1])
+    assert result.created == []
+    assert result.errors[0].detail == "Book already exists"
+
+
+async def test_import_books_rejects_near_duplicate_titles(
+    db_session, genre_created, cleanup_import
+):
+    items = [
+        {"title": "Import Book 5", "authors": ["Import Author 5"], "genre": genre_created.name},
+        {"title": "import  book 5 ", "authors": ["Import Author 5"], "genre": genre_created.name},
+    ]
+
+    result = await import_books(db_session, items)
+    assert [book.title for book in result.created] == ["Import Book 5"]
+    assert result.errors[0].detail == "Duplicate title in upload"
+
+    result = await import_books(
+        db_session,
+        [{"title": "IMPORT BOOK\t5", "authors": ["Import Author 5"], "genre": genre_created.name}],
+    )
+    assert result.errors[0].detail == "Book already exists"
@@ -5,6 +5,7 @@ import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.crud.book_search import search_books
 from app.models.author import Author
 from app.models.book import Book
@@ -75,3 +76,14 @@ async def test_search_books_by_title(db_session: AsyncSession, books_created):
     query = target_book.title.split()[0]
     results = await search_books(db_session, query)
     assert any(target_book.title == book.title for book in results)
+
+
+async def test_search_books_core_matches_orm(db_session: AsyncSession, books_created, monkeypatch):
+    results = {}
+    for core in (True, False):
+        monkeypatch.setattr(settings, "book_reads_core", core)
+        found = await search_books(db_session, "author 3")
+        results[core] = sorted(found, key=lambda book: book.id)
+
+    assert results[True]
+    assert results[True] == results[False]
@@ -1,7 +1,10 @@
 import pytest
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.genre import get_genre_by_name
+from app.crud.genre import genre_cache, get_genre_by_name, get_genre_id_by_name
+from app.models.author import Author
+from app.models.book import Book, book_author_association
 from app.models.genre import Genre
 
 
@@ -20,3 +23,70 @@ async def test_get_genre_by_name(db_session, genre_created):
     genre = await get_genre_by_name(db_session, "science fiction")
     assert genre is not None
     assert str(genre.name) == str(genre_created.name)
+
+
+async def test_get_genre_id_by_name(db_session, genre_created):
+    genre_id = await get_genre_id_by_name(db_session, "science fiction")
+    assert genre_id == genre_created.id
+    assert genre_cache.is_fresh()
+
+    assert await get_genre_id_by_name(db_session, "missing genre") is None
+
+
+async def test_genre_cache_resolves_without_query(
+    db_session, count_statements, genre_created
+):
+    await genre_cache.load(db_session)
+    genre_id, statements = await count_statements(
+        lambda: get_genre_id_by_name(db_session, "science fiction")
+    )
+
+    assert genre_id == genre_created.id
+    assert statements == []
+
+
+async def test_genre_cache_invalidated_on_write(db_session, genre_created):
+    await genre_cache.load(db_session)
+
+    genre = Genre(name="new genre")
+    db_session.add(genre)
+    await db_session.commit()
+
+    assert not genre_cache.is_fresh()
+    assert await get_genre_id_by_name(db_session, "new genre") == genre.id
+
+    await db_session.delete(genre)
+    await db_session.commit()
+
+
+async def test_delete_genre_cascades_in_database(db_session, count_statements):
+    genre = Genre(name="cascade genre")
+    author = Author(name="Cascade Author")
+    db_session.add_all(
+        [Book(title=f"Cascade Book {i}", genre=genre, authors=[author]) for i in range(3)]
+    )
+    await db_session.commit()
+    genre_id, author_id = genre.id, author.id
+    db_session.expunge_all()
+
+    genre = await db_session.get(Genre, genre_id)
+
+    async def delete_genre():
+        await db_session.delete(genre)
+        await db_session.commit()
+
+    _, statements = await count_statements(delete_genre)
+
+    assert not [statement for statement in statements if "books" in statement]
+    books = await db_session.scalar(
+        select(func.count()).select_from(Book).where(Book.genre_id == genre_id)
+    )
+    links = await db_session.scalar(
+        select(func.count())
+        .select_from(book_author_association)
+        .where(book_author_association.c.author_id == author_id)
+    )
+    assert (books, links) == (0, 0)
+
+    await db_session.execute(delete(Author).where(Author.id == author_id))
+    await db_session.commit()
@@ -0,0 +1,209 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import hash_password
+from app.crud.import_job import (
+    claim_import_job,
+    create_import_job,
+    get_import_job,
+    process_next_import_job,
+)
+from app.models.author import Author
+from app.models.book import Book, book_author_association
+from app.models.genre import Genre
+from app.models.import_job import ImportJob, ImportJobBlock
+from app.models.user import User
+
+
+@pytest.fixture
+async def genre_created(db_session: AsyncSession):
+    genre = Genre(name="genre 1")
+    db_session.add(genre)
+    await db_session.commit()
+    await db_session.refresh(genre)
+    yield genre
+    await db_session.delete(genre)
+    await db_session.commit()
+
+
+@pytest.fixture
+async def users_created(db_session: AsyncSession):
+    users = [
+        User(email=f"importer{i}@example.com", password=hash_password("password123"))
+        for i in range(2)
+    ]
+    db_session.add_all(users)
+    await db_session.commit()
+    yield users
+    await db_session.execute(delete(ImportJob))
+    for user in users:
+        await db_session.delete(user)
+    await db_session.commit()
+
+
+@pytest.fixture
+async def cleanup_import(db_session: AsyncSession):
+    yield
+    book_ids = select(Book.id).where(Book.title.like("Job Book%"))
+    await db_session.execute(
+        delete(book_author_association).where(
+            book_author_association.c.book_id.in_(book_ids)
+        )
+    )
+    await db_session.execute(delete(Book).where(Book.title.like("Job Book%")))
+    await db_session.execute(delete(Author).where(Author.name.like("Job Author%")))
+    await db_session.commit()
+
+
+def upload(items: list) -> io.BytesIO:
+    return io.BytesIO(json.dumps(items).encode())
+
+
+async def test_import_job_runs_in_background(
+    db_session, users_created, genre_created, cleanup_import
+):
+    items = [
+        {"title": f"Job Book {i}", "authors": ["Job Author"], "genre": genre_created.name}
+        for i in range(3)
+    ] + [{"title": "Job Book 0", "authors": ["Job Author"], "genre": genre_created.name}]
+    owner_id, other_user_id = (user.id for user in users_created)
+    job = await create_import_job(db_session, owner_id, upload(items), "books.json", "json")
+    assert job.status == "queued"
+
+    assert await process_next_import_job(db_session) is True
+    assert await process_next_import_job(db_session) is False
+
+    job = await get_import_job(db_session, job.id, owner_id)
+    assert job.status == "completed"
+    assert (job.rows_processed, job.rows_created, job.error_count) == (4, 3, 1)
+    assert job.errors[0].index == 3
+    assert job.rows_per_second is not None
+
+    with pytest.raises(HTTPException) as excinfo:
+        await get_import_job(db_session, job.id, other_user_id)
+    assert excinfo.value.status_code == 404
+
+
+async def test_import_job_file_is_stored_in_blocks(
+    db_session, users_created, genre_created, cleanup_import, monkeypatch
+):
+    monkeypatch.setattr("app.crud.import_job.IMPORT_BLOCK_SIZE", 64)
+    items = [
+        {"title": f"Job Book {i}", "authors": ["Job Author"], "genre": genre_created.name}
+        for i in range(5)
+    ]
+    job = await create_import_job(
+        db_session, users_created[0].id, upload(items), "books.json", "json"
+    )
+    blocks = await db_session.scalar(
+        select(func.count()).where(ImportJobBlock.job_id == job.id)
+    )
+    assert blocks == -(-len(json.dumps(items)) // 64)
+
+    # Any worker can run it: the file is read back from the database
+    assert await process_next_import_job(db_session)
+    job = await get_import_job(db_session, job.id, users_created[0].id)
+    assert (job.status, job.rows_created) == ("completed", 5)
+    blocks = await db_session.scalar(
+        select(func.count()).where(ImportJobBlock.job_id == job.id)
+    )
+    assert blocks == 0
+
+
+async def test_import_job_rejects_non_list(db_session, users_created):
+    with pytest.raises(HTTPException) as excinfo:
+        await create_import_job(
+            db_session, users_created[0].id, upload({"title": "x"}), "books.json", "json"
+        )
+    assert excinfo.value.status_code == 400
+
+
+async def test_claim_import_job_caps_jobs_per_user(db_session, users_created):
+    first, second = (user.id for user in users_created)
+    jobs = [
+        await create_import_job(db_session, user_id, upload([]), "books.json", "json")
+        for user_id in (first, first, second)
+    ]
+
+    claimed = await claim_import_job(db_session)
+    assert claimed.id == jobs[0].id
+
+    # The first user already has a running job, so their second one waits
+    claimed = await claim_import_job(db_session)
+    assert claimed.id == jobs[2].id
+    assert await claim_import_job(db_session) is None
+
+
+async def test_import_job_is_idempotent(db_session, users_created):
+    owner_id = users_created[0].id
+    first = await create_import_job(db_session, owner_id, upload([]), "books.json", "json")
+    again = await create_import_job(db_session, owner_id, upload([]), "again.json", "json")
+    assert again.id == first.id
+
+    keyed = await create_import_job(
+        db_session, owner_id, upload([]), "books.json", "json", idempotency_key="import-1"
+    )
+    assert keyed.id != first.id
+    with pytest.raises(HTTPException) as excinfo:
+        await create_import_job(
+            db_session,
+            owner_id,
+            upload([{"title": "Job Book"}]),
+            "books.json",
+            "json",
+            idempotency_key="import-1",
+        )
+    assert excinfo.value.status_code == 409
+
+
+async def test_import_job_resumes_from_checkpoint(
+    db_session, users_created, genre_created, cleanup_import
+):
+    owner_id = users_created[0].id
+    items = [
+        {"title": f"Job Book {i}", "authors": ["Job Author"], "genre": genre_created.name}
+        for i in range(4)
+    ]
+    job = await create_import_job(db_session, owner_id, upload(items), "books.json", "json")
+
+    # The worker died after committing the first two entries
+    await db_session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id)
+        .values(
+            status="running",
+            rows_processed=2,
+            rows_created=2,
+            attempts=1,
+            heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+    )
+    await db_session.commit()
+
+    assert await process_next_import_job(db_session)
+
+    job = await get_import_job(db_session, job.id, owner_id)
+    assert (job.status, job.rows_processed, job.rows_created) == ("completed", 4, 4)
+    result = await db_session.execute(select(Book.title).where(Book.title.like("Job Book%")))
+    assert sorted(result.scalars().all()) == ["Job Book 2", "Job Book 3"]
+
+
+async def test_failed_import_job_is_resumed_on_resubmit(db_session, users_created):
+    owner_id = users_created[0].id
+    job = await create_import_job(db_session, owner_id, upload([]), "books.json", "json")
+    await db_session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id)
+        .values(status="failed", rows_processed=1000, detail="Import interrupted")
+    )
+    await db_session.commit()
+
+    resumed = await create_import_job(db_session, owner_id, upload([]), "books.json", "json")
+    assert resumed.id == job.id
+    assert (resumed.status, resumed.rows_processed, resumed.detail) == ("queued", 1000, None)
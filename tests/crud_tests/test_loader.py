@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.loader import BatchLoader
+from app.models.genre import Genre
+
+
+@pytest.fixture
+async def genres_created(db_session: AsyncSession):
+    genres = [Genre(name=f"loader genre {i}") for i in range(3)]
+    db_session.add_all(genres)
+    await db_session.commit()
+    for genre in genres:
+        await db_session.refresh(genre)
+    yield genres
+    for genre in genres:
+        await db_session.delete(genre)
+    await db_session.commit()
+
+
+@pytest.fixture
+def genre_loader():
+    async def load_genre_ids(db, names):
+        result = await db.execute(
+            select(Genre.id, Genre.name).filter(Genre.name.in_(names))
+        )
+        return {name: genre_id for genre_id, name in result.all()}
+
+    return BatchLoader(load_genre_ids, tick=0.01)
+
+
+async def test_batch_loader_coalesces_concurrent_lookups(
+    db_session, genres_created, genre_loader
+):
+    results = await asyncio.gather(
+        genre_loader.load(db_session, "loader genre 0"),
+        genre_loader.load(db_session, "loader genre 0"),
+        genre_loader.load_many(db_session, ["loader genre 1", "loader genre 2"]),
+        genre_loader.load(db_session, "missing genre"),
+    )
+
+    assert results[0] == results[1] == genres_created[0].id
+    assert results[2] == {
+        "loader genre 1": genres_created[1].id,
+        "loader genre 2": genres_created[2].id,
+    }
+    assert results[3] is None
+    assert genre_loader.stats["batches"] == 1
+    assert genre_loader.stats["coalesced"] == 1
+
+
+async def test_batch_loader_survives_cancelled_waiter(
+    db_session, genres_created, genre_loader
+):
+    cancelled = asyncio.ensure_future(genre_loader.load(db_session, "loader genre 0"))
+    waiter = asyncio.ensure_future(genre_loader.load(db_session, "loader genre 0"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiter == genres_created[0].id
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled